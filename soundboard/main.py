@@ -1,8 +1,15 @@
 #!/usr/bin/env python3
+import time
+_import_start = time.perf_counter()
+
 import json
 import logging
 import os
+import signal
+import socket
+from contextlib import contextmanager
 from pathlib import Path
+from PyQt5.QtCore import QSocketNotifier, QTimer
 from PyQt5.QtWidgets import QApplication
 from modules.gui import SoundboardGUI
 from modules.audio import AudioPlayer
@@ -10,74 +17,228 @@ from modules.gpio_handler import GPIOHandler
 from modules.hid_communication import HIDCommunication
 from modules.hid_device import HIDDevice
 from modules.config_manager import ConfigManager
+from modules.scheduler import RenderScheduler
+from modules.warmup import SoundWarmup, collect_sound_files
+from modules.latency import LatencyMonitor
+from modules.profiling import ProfilingSession
+from modules.log_pipeline import LogPipeline
+from modules.input_bus import InputBus, InputDispatcher, compile_action_table
+from functools import partial
 import sys
 
+_import_time = time.perf_counter() - _import_start
+
 class Soundboard:
     def __init__(self, app):
         # QApplication Referenz speichern
         self.app = app
+        self.startup_times = {'imports': _import_time}
+        init_start = time.perf_counter()
         
         # Logging zuerst einrichten
         self._setup_logging()
         
         # Konfiguration laden
-        self.config_manager = ConfigManager()
-        self.config = self.config_manager.load_config()
+        with self._startup_phase('config'):
+            self.config_manager = ConfigManager()
+            self.config = self.config_manager.load_config()
+            self.log_pipeline.configure(self.config.get('logging', {}))
+            self.sound_files = collect_sound_files(self.config)
+            # Aktionen aller Eingabequellen einmalig auflösen
+            self.action_table = compile_action_table(
+                SoundboardGUI.button_layout(self.config), self.config.get('gpio_actions', {}),
+                self.config.get('keypad_actions', {}))
+            self.input_bus = InputBus(self.config.get('input_settings', {}).get('queue_size', 1024))
         
         # Audio-Player vor GUI initialisieren
-        self.audio_player = AudioPlayer(self.config['audio_settings'])
-        self.hid_device = HIDDevice()
+        with self._startup_phase('audio'):
+            audio_settings = self.config['audio_settings']
+            self.audio_player = AudioPlayer(audio_settings)
+            self.scheduler = RenderScheduler(
+                self.audio_player,
+                workers=audio_settings.get('render_workers', 2),
+                max_pending=audio_settings.get('render_queue_size', 32)
+            )
+            self.scheduler.start()
+            self.latency = self._create_latency_monitor()
+        with self._startup_phase('hid'):
+            self.hid_device = HIDDevice()
         
         # GUI initialisieren
-        self.gui = SoundboardGUI(self._handle_button_press, self.config)
-        self.gui.set_audio_player(self.audio_player)  # Audio-Player-Referenz setzen
-        self.gui.hid_device = self.hid_device
+        with self._startup_phase('gui'):
+            self.gui = SoundboardGUI(partial(self.input_bus.post, 'touch'), self.config)
+            self.gui.set_audio_player(self.audio_player)  # Audio-Player-Referenz setzen
+            self.gui.latency = self.latency
         
         # Andere Module nach GUI initialisieren
-        self.gpio_handler = GPIOHandler(self.config['gpio_pins'], self._handle_gpio_event)
-        self.hid_comm = HIDCommunication()
+        with self._startup_phase('gpio'):
+            # Ereignisse aus dem gpiozero-Thread gehen über den InputBus
+            self.gpio_handler = GPIOHandler(
+                self.config['gpio_pins'], partial(self.input_bus.post, 'gpio'),
+                matrix=self.config.get('gpio_matrix'),
+                keypad_callback=partial(self.input_bus.post, 'keypad'))
+        with self._startup_phase('hid'):
+            self.hid_comm = HIDCommunication()
+            if self.latency is not None:
+                self.latency.add_metrics('hid', self.hid_comm.get_stats)
         
-    def _setup_logging(self):
-        log_dir = Path('logs')
-        log_dir.mkdir(exist_ok=True)
+        self.startup_times['total'] = _import_time + time.perf_counter() - init_start
+        self._log_startup_report()
         
-        logging.basicConfig(
-            filename=log_dir / 'soundboard.log',
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
+        # Sounds im Hintergrund vorladen, die GUI bleibt bedienbar
+        self.warmup = SoundWarmup(
+            self.audio_player,
+            self.sound_files,
+            workers=self.config['audio_settings'].get('warmup_workers', 2)
         )
+        self.warmup.progress.connect(self.gui.show_warmup_progress)
+        self.warmup.start()
+        
+        # Alle Eingaben werden im GUI-Thread ausgeführt
+        self.dispatcher = InputDispatcher(
+            self.input_bus, self.action_table, self.audio_player, self.scheduler,
+            warmup=self.warmup, hid_comm=self.hid_comm, hid_device=self.hid_device,
+            latency=self.latency
+        )
+        
+        # Profiling per Konfiguration oder Signal (z.B. kill -USR1 <pid>)
+        self.profiling = None
+        self._profiling_settings = self.config.get('diagnostics', {}).get('profiling', {})
+        self._profiling_timer = QTimer()
+        self._profiling_timer.setSingleShot(True)
+        self._profiling_timer.timeout.connect(self.stop_profiling)
+        self._install_profiling_signal()
+        if self._profiling_settings.get('enabled', False):
+            self.start_profiling()
+        
+    @contextmanager
+    def _startup_phase(self, phase):
+        """Misst die Dauer einer Startphase (mehrfache Phasen werden addiert)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.startup_times[phase] = self.startup_times.get(phase, 0.0) + elapsed
 
-    def _handle_button_press(self, button_id):
-        """Verarbeitet Touchscreen-Button-Events"""
+    def _log_startup_report(self):
+        """Schreibt die Startzeiten je Phase ins Log und prüft das Zeitbudget"""
+        report = ", ".join(
+            f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in self.startup_times.items()
+        )
+        logging.info(f"Startzeiten: {report}")
+        
+        budget_ms = self.config.get('diagnostics', {}).get('startup_budget_ms')
+        total_ms = self.startup_times['total'] * 1000
+        if budget_ms and total_ms > budget_ms:
+            logging.warning(
+                f"Start dauerte {total_ms:.0f} ms, Budget sind {budget_ms} ms"
+            )
+        
+    def _create_latency_monitor(self):
+        """Latenz-Messung je Auslöser (diagnostics.latency_tracking)"""
+        diagnostics = self.config.get('diagnostics', {})
+        if not diagnostics.get('latency_tracking', True):
+            return None
+        monitor = LatencyMonitor(
+            diagnostics.get('latency_metrics', 'logs/latency.json'),
+            dump_interval=diagnostics.get('latency_dump_s', 60),
+            output_latency=self.audio_player.backend.output_latency
+        )
+        monitor.start()
+        return monitor
+
+    def _install_profiling_signal(self):
+        """
+        Schaltet das Profiling per Unix-Signal um
+
+        Python führt Signal-Handler nur zwischen Bytecodes aus, die
+        Qt-Ereignisschleife läuft aber in C++. Über set_wakeup_fd weckt das
+        Signal einen QSocketNotifier, dessen Slot den Handler ausführen lässt.
+        """
+        signum = getattr(signal, self._profiling_settings.get('signal', 'SIGUSR1'), None)
+        if signum is None:
+            return
+        self._signal_sockets = socket.socketpair()
+        for sock in self._signal_sockets:
+            sock.setblocking(False)
+        signal.set_wakeup_fd(self._signal_sockets[1].fileno())
+        self._signal_notifier = QSocketNotifier(
+            self._signal_sockets[0].fileno(), QSocketNotifier.Read)
+        self._signal_notifier.activated.connect(self._drain_signal_socket)
+        signal.signal(signum, lambda *_: self.toggle_profiling())
+
+    def _drain_signal_socket(self):
         try:
-            button_config = self.config['buttons'].get(str(button_id))
-            action = button_config.get('action') if button_config else None
-            if action:
-                if action.endswith(('.wav', '.mp3')):
-                    self.audio_player.play(action)
-                else:
-                    self.hid_comm.send_command(action)
-        except Exception as e:
-            logging.error(f"Fehler bei Button-Verarbeitung: {e}")
+            self._signal_sockets[0].recv(64)
+        except OSError:
+            pass
 
-    def _handle_gpio_event(self, pin):
-        """Verarbeitet GPIO-Button-Events"""
+    def start_profiling(self):
+        """Startet eine Profiling-Messung für diagnostics.profiling.window_s"""
+        if self.profiling is not None:
+            return
+        settings = self._profiling_settings
         try:
-            action = self.config['gpio_actions'].get(str(pin))
-            if action:
-                if action.endswith(('.wav', '.mp3')):
-                    self.audio_player.play(action)
-                else:
-                    self.hid_comm.send_command(action)
-        except Exception as e:
-            logging.error(f"Fehler bei GPIO-Verarbeitung: {e}")
+            session = ProfilingSession(
+                'logs',
+                mode=settings.get('mode', 'sample'),
+                sample_interval_ms=settings.get('sample_interval_ms', 5),
+                slow_call_ms=settings.get('slow_call_ms', 50)
+            )
+        except ValueError as e:
+            logging.error(f"Profiling nicht möglich: {e}")
+            return
+        session.trace(self.audio_player.effects, 'process_audio',
+                      lambda args, kwargs: {
+                          'frames': len(args[0]),
+                          'source': str(kwargs.get('source_path'))
+                      })
+        # Live-Auslöser dekodieren und rendern in load() auf den Scheduler-Workern
+        session.trace(self.audio_player, 'load',
+                      lambda args, kwargs: {'sound_file': args[0]})
+        session.start()
+        self.profiling = session
+        self._profiling_timer.start(int(settings.get('window_s', 30) * 1000))
+
+    def stop_profiling(self):
+        """Beendet die laufende Profiling-Messung und schreibt die Dateien"""
+        self._profiling_timer.stop()
+        session, self.profiling = self.profiling, None
+        if session is not None:
+            try:
+                session.stop()
+            except OSError as e:
+                logging.error(f"Profiling-Ergebnisse konnten nicht geschrieben werden: {e}")
+
+    def toggle_profiling(self):
+        if self.profiling is None:
+            self.start_profiling()
+        else:
+            self.stop_profiling()
+
+    def _setup_logging(self):
+        # Meldungen gehen über eine Queue an einen Schreib-Thread, damit
+        # Button- und Audio-Threads nie auf die SD-Karte warten
+        self.log_pipeline = LogPipeline(Path('logs') / 'soundboard.log')
 
     def run(self):
         """Startet die Hauptanwendung"""
         try:
             logging.info("Soundboard wird gestartet...")
             self.gui.show()
-            return self.app.exec_()
+            result = self.app.exec_()
+            self.stop_profiling()
+            self.gpio_handler.cleanup()
+            self.hid_comm.close()
+            self.warmup.stop()
+            self.scheduler.stop()
+            if self.latency is not None:
+                self.latency.stop()
+            self.audio_player.close()
+            # Zuletzt, damit auch Meldungen beim Beenden im Log landen
+            self.log_pipeline.close()
+            return result
         except Exception as e:
             logging.error(f"Kritischer Fehler: {e}")
             raise
@@ -1,9 +1,279 @@
-from PyQt5.QtMultimedia import QSound, QMediaPlayer, QMediaContent
-from PyQt5.QtCore import QUrl
 import logging
+import soundfile as sf
+import numpy as np
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
 from .audio_effects import AudioEffects
-import soundfile as sf
+from .file_stream import StreamingFileVoice
+from .ingest import IngestManifest
+from .mixer import StreamVoice, Voice, conform
+from .playback import create_backend
+from .sound_bank import SoundBank
+
+
+class SampleCache:
+    """
+    LRU-Cache für dekodierte Audiodaten
+
+    Einträge sind über (Pfad, mtime) adressiert, eine geänderte Datei
+    wird daher automatisch neu dekodiert. Die Größe ist durch ein
+    Byte-Budget begrenzt, bei Überschreitung werden die am längsten
+    nicht benutzten Einträge verworfen. Sind Abtastrate und Kanalzahl
+    angegeben, werden die Daten beim Dekodieren auf das Format des
+    Mixers gebracht.
+
+    Mit einer Sound-Bank (siehe sound_bank.py) werden passende Einträge
+    direkt als Views auf die gemappte Datei geliefert, ohne Dekodieren
+    und ohne das Byte-Budget zu belasten. gain_for liefert optional eine
+    Verstärkung je Datei (Lautheits-Normalisierung aus dem Ingest), die
+    beim Dekodieren angewendet wird.
+    """
+
+    def __init__(self, max_bytes, sample_rate=None, channels=None, bank=None, bank_root=None,
+                 gain_for=None):
+        self.max_bytes = max(0, int(max_bytes))
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.gain_for = gain_for
+        self.bank = bank
+        self.bank_root = Path(bank_root) if bank_root else None
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bank_hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def file_key(sound_path):
+        """Identität einer Datei: Pfad und Änderungszeit"""
+        return (str(sound_path), sound_path.stat().st_mtime_ns)
+
+    def get(self, sound_path, key=None):
+        """
+        Liefert (audio_data, sample_rate) für eine Datei, dekodiert bei Bedarf
+
+        Die gelieferten Arrays sind schreibgeschützt und dürfen nicht
+        verändert werden.
+        """
+        key = key or self.file_key(sound_path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        gain = self.gain_for(sound_path) if self.gain_for else 1.0
+        banked = self._from_bank(sound_path)
+        if banked is not None:
+            audio_data, sample_rate = banked
+            if gain == 1.0 and self._matches_mixer(audio_data, sample_rate):
+                # Zero-Copy: View auf die Bank, kein Cache-Eintrag nötig
+                with self._lock:
+                    self.bank_hits += 1
+                return banked
+            if audio_data.dtype == np.int16:
+                audio_data = audio_data.astype(np.float32) / 32767.0
+
+        with self._lock:
+            self.misses += 1
+
+        if banked is None:
+            # Dekodieren außerhalb des Locks, damit andere Zugriffe nicht warten
+            audio_data, sample_rate = sf.read(str(sound_path), dtype='float32')
+        if self.channels:
+            audio_data = conform(audio_data, sample_rate, self.sample_rate, self.channels)
+            sample_rate = self.sample_rate or sample_rate
+        if gain != 1.0:
+            audio_data = audio_data * np.float32(gain)
+        audio_data.flags.writeable = False
+        entry = (audio_data, sample_rate)
+
+        with self._lock:
+            self._store(key, entry)
+        return entry
+
+    def _from_bank(self, sound_path):
+        """Sucht eine Datei in der Sound-Bank, liefert (view, sample_rate) oder None"""
+        if self.bank is None:
+            return None
+        try:
+            name = Path(sound_path).relative_to(self.bank_root).as_posix()
+        except ValueError:
+            return None
+        return self.bank.get(name, sound_path)
+
+    def _matches_mixer(self, audio_data, sample_rate):
+        """Prüft, ob Bank-Daten unverändert an den Mixer gehen können"""
+        if audio_data.dtype != np.float32:
+            return False
+        if not self.channels:
+            # QMediaPlayer-Backend: Format der Quelldatei wird übernommen
+            return True
+        return (
+            audio_data.shape[1] == self.channels
+            and (not self.sample_rate or sample_rate == self.sample_rate)
+        )
+
+    def _store(self, key, entry):
+        """Legt einen Eintrag ab und hält das Byte-Budget ein"""
+        size = entry[0].nbytes
+        if size > self.max_bytes:
+            # Passt nicht ins Budget - nicht cachen
+            return
+
+        # Veraltete Versionen derselben Datei entfernen
+        for old_key in [k for k in self._entries if k[0] == key[0]]:
+            self._remove(old_key)
+
+        self._entries[key] = entry
+        self.current_bytes += size
+
+        while self.current_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[0].nbytes
+
+    def clear(self):
+        """Leert den Cache"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def get_stats(self):
+        """Liefert Zähler und Füllstand zur Dimensionierung des Caches"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'bank_hits': self.bank_hits,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+
+class RenderCache:
+    """
+    LRU-Cache für mit Effekten bearbeitete Audiodaten
+
+    Der Schlüssel besteht aus der Datei-Identität und den quantisierten
+    Werten der aktiven Effekte. Kleine Schwankungen eines Sliders landen
+    so im selben Bucket. Jeder Eintrag hängt nur von den Effekten ab, die
+    beim Rendern aktiv waren - nur diese invalidieren ihn.
+    """
+
+    def __init__(self, max_bytes, step=2):
+        self.max_bytes = max(0, int(max_bytes))
+        self.step = max(1, step)
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bucket(self, value):
+        """Quantisiert einen Parameterwert"""
+        return int(round(value / self.step))
+
+    def make_key(self, file_key, effects, params):
+        """
+        Erzeugt den Cache-Schlüssel für eine Datei und einen Parameter-Snapshot
+
+        :param file_key: Ergebnis von SampleCache.file_key()
+        :param effects: AudioEffects-Instanz
+        :param params: Parameter-Snapshot (AudioEffects.snapshot())
+        """
+        deps = []
+        for name in params:
+            value = effects.get_effect_value(name, params)
+            if value > 0:
+                deps.append((name, self.bucket(value)))
+        return (file_key, tuple(deps))
+
+    def get(self, key):
+        """Liefert (processed, sample_rate) oder None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, processed, sample_rate):
+        """Legt ein gerendertes Ergebnis ab"""
+        size = processed.nbytes
+        if size > self.max_bytes:
+            return
+        processed.flags.writeable = False
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (processed, sample_rate)
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, effect_name, value):
+        """
+        Verwirft alle Einträge, die mit einem anderen Wert des Effekts
+        gerendert wurden
+
+        Einträge, bei denen der Effekt nicht aktiv war, bleiben erhalten.
+        """
+        new_bucket = self.bucket(value) if value > 0 else None
+        with self._lock:
+            stale = [
+                key for key in self._entries
+                if any(name == effect_name and bucket != new_bucket
+                       for name, bucket in key[1])
+            ]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[0].nbytes
+
+    def clear(self):
+        """Leert den Cache"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def get_stats(self):
+        """Liefert Zähler und Füllstand des Caches"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes
+            }
+
 
 class AudioPlayer:
     def __init__(self, audio_settings):
@@ -15,13 +285,50 @@ class AudioPlayer:
             self.sounds_dir = Path('sounds')
             self.sounds_dir.mkdir(exist_ok=True)
             
-            # Media Player für jeden Kanal
-            self.players = [QMediaPlayer() for _ in range(16)]
-            for player in self.players:
-                player.setVolume(int(self.volume * 100))
+            # Ausgabe-Backend (sounddevice, QMediaPlayer oder Null-Ausgabe)
+            self.backend = create_backend(audio_settings, self.sounds_dir)
+            
+            self.effects = AudioEffects(
+                reverb_ir=audio_settings.get('reverb_ir'),
+                chain=audio_settings.get('effects_chain')
+            )
+            
+            # Aufbereitete Sounds aus dem Ingest (optional)
+            self.ingest = self._open_ingest(audio_settings.get('ingest_dir'))
+            
+            # Vordekodierte Sound-Bank (optional, per Memory-Mapping)
+            self.sound_bank = self._open_sound_bank(audio_settings.get('sound_bank'))
+            
+            # Cache für dekodierte Samples
+            cache_mb = audio_settings.get('sample_cache_mb', 256)
+            self.sample_cache = SampleCache(
+                cache_mb * 1024 * 1024,
+                sample_rate=self.backend.sample_rate,
+                channels=self.backend.channels,
+                bank=self.sound_bank,
+                bank_root=self.ingest.output_dir if self.ingest else self.sounds_dir,
+                gain_for=self.ingest.gain_for if self.ingest else None
+            )
+            
+            # Cache für Ergebnisse der Effektkette
+            render_mb = audio_settings.get('render_cache_mb', 128)
+            self.render_cache = RenderCache(
+                render_mb * 1024 * 1024,
+                step=audio_settings.get('render_cache_step', 2)
+            )
+            self._previous_values = {}
+            self._render_locks = {}
+            self._render_locks_guard = threading.Lock()
             
-            self.current_player = 0
-            self.effects = AudioEffects()
+            # 'render': ganze Datei vorab berechnen (mit Cache)
+            # 'stream': Effekte blockweise während der Wiedergabe
+            self.effects_mode = audio_settings.get('effects_mode', 'render')
+            self.block_size = audio_settings.get('block_size', 512)
+            
+            # Lange Dateien werden während der Wiedergabe dekodiert
+            self.stream_threshold = audio_settings.get('stream_threshold_s', 30)
+            self.stream_read_ahead = audio_settings.get('stream_read_ahead_s', 2.0)
+            self._durations = {}
             
             logging.info("Audio-Player erfolgreich initialisiert")
             
@@ -29,78 +336,344 @@ class AudioPlayer:
             logging.error(f"Fehler bei Audio-Player-Initialisierung: {e}")
             raise
 
+    def _open_ingest(self, ingest_dir):
+        """Lädt das Ingest-Manifest, ohne Manifest werden die Originale gespielt"""
+        if not ingest_dir:
+            return None
+        try:
+            manifest = IngestManifest(ingest_dir, self.sounds_dir)
+            logging.info(f"Ingest-Manifest mit {len(manifest.entries)} Sounds geladen")
+            return manifest
+        except Exception as e:
+            logging.warning(f"Ingest-Manifest in {ingest_dir} nicht lesbar: {e}")
+            return None
+
+    def _resolve(self, sound_file):
+        """Pfad der aufbereiteten Datei, falls aktuell, sonst des Originals"""
+        if self.ingest is not None:
+            ingested = self.ingest.resolve(sound_file)
+            if ingested is not None:
+                return ingested
+        return self.sounds_dir / sound_file
+
+    @staticmethod
+    def _open_sound_bank(bank_path):
+        """Öffnet die Sound-Bank, bei Fehlern wird normal dekodiert"""
+        if not bank_path:
+            return None
+        try:
+            return SoundBank(bank_path)
+        except Exception as e:
+            logging.warning(f"Sound-Bank {bank_path} nicht nutzbar, dekodiere Dateien: {e}")
+            return None
+
     def set_effect_param(self, effect_name, value):
         """Setzt Parameter für einen Audio-Effekt"""
-        self.effects.set_effect_param(effect_name, value)
+        self.set_effect_params({effect_name: value})
 
-    def play(self, sound_file):
+    def set_effect_params(self, values):
         """
-        Spielt eine Audiodatei ab
+        Übernimmt mehrere Effekt-Werte auf einmal (ein neuer Snapshot)
+
+        :param values: Effektname -> Wert (0 bis 100)
+        """
+        self.effects.update_params(values)
+        for effect_name, value in values.items():
+            self.render_cache.invalidate(effect_name, value)
+
+    def render(self, sound_path, trace=None):
+        """
+        Liefert (processed, sample_rate) für eine Datei mit den aktuellen
+        Effekt-Einstellungen, aus dem Cache wenn möglich
+
+        :param trace: Optionaler latency.Trace, erhält die Marken
+                      'decode' und 'effects'
         """
+        file_key = SampleCache.file_key(sound_path)
+        params = self.effects.snapshot()
+        key = self.render_cache.make_key(file_key, self.effects, params)
+
+        # Gleichzeitige Anfragen für dieselbe Datei (z.B. Vorladen und
+        # Tastendruck) rechnen nur einmal, die zweite wartet auf den Cache
+        with self._render_lock(key):
+            if not key[1]:
+                # Keine Effekte aktiv - das dekodierte Sample genügt
+                entry = self.sample_cache.get(sound_path, file_key)
+                self._mark(trace, 'decode', 'effects')
+                return entry
+
+            entry = self.render_cache.get(key)
+            if entry is not None:
+                self._mark(trace, 'decode', 'effects')
+                return entry
+
+            audio_data, sample_rate = self.sample_cache.get(sound_path, file_key)
+            self._mark(trace, 'decode')
+            processed = self.effects.process_audio(
+                audio_data, sample_rate, params, source_path=sound_path)
+            if self.backend.channels:
+                processed = conform(processed, sample_rate, sample_rate, self.backend.channels)
+            self.render_cache.put(key, processed, sample_rate)
+            self._mark(trace, 'effects')
+            return processed, sample_rate
+
+    @staticmethod
+    def _mark(trace, *stages):
+        if trace is not None:
+            for stage in stages:
+                trace.mark(stage)
+
+    @contextmanager
+    def _render_lock(self, key):
+        """Sperre je Render-Schlüssel, solange dieser berechnet wird"""
+        with self._render_locks_guard:
+            entry = self._render_locks.get(key)
+            if entry is None:
+                entry = self._render_locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
         try:
-            sound_path = self.sounds_dir / sound_file
-            
-            if not sound_path.exists():
-                logging.error(f"Audiodatei nicht gefunden: {sound_path}")
-                return
-                
-            # Lade und verarbeite Audio
-            audio_data, sample_rate = sf.read(str(sound_path))
-            processed = self.effects.process_audio(audio_data, sample_rate)
-            
-            # Speichere verarbeitetes Audio temporär
-            temp_path = self.sounds_dir / f"temp_{sound_file}"
-            sf.write(temp_path, processed, sample_rate)
+            with entry[0]:
+                yield
+        finally:
+            with self._render_locks_guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._render_locks[key]
+
+    def prepare(self, sound_file):
+        """
+        Dekodiert und rendert einen Sound vorab, ohne ihn abzuspielen
+
+        :return: True wenn der Sound bereitliegt
+        """
+        sound_path = self._resolve(sound_file)
+        if not sound_path.exists():
+            logging.warning(f"Audiodatei zum Vorladen nicht gefunden: {sound_path}")
+            return False
+
+        if self._should_stream_file(sound_path):
+            # Lange Dateien werden erst beim Abspielen dekodiert
+            return True
+
+        if self._can_stream():
+            # Effekte laufen erst beim Abspielen, nur dekodieren
+            self.sample_cache.get(sound_path)
+        else:
+            self.render(sound_path)
+        return True
+
+    def _can_stream(self):
+        """Prüft, ob der Sound mit blockweisen Effekten gespielt werden kann"""
+        return (
+            self.effects_mode == 'stream'
+            and self.backend.channels is not None
+            and self.effects.supports_streaming()
+        )
+
+    def _create_stream_voice(self, sound_path, sound_file, trace=None):
+        """Erzeugt eine Stimme, deren Effekte während der Wiedergabe laufen"""
+        audio_data, sample_rate = self.sample_cache.get(sound_path)
+        self._mark(trace, 'decode')
+        stream = self.effects.create_stream(
+            sample_rate, self.backend.channels, block_size=self.block_size)
+        return StreamVoice(
+            audio_data, 0, stream.process,
+            block_size=self.block_size, sound_file=sound_file,
+            latency=stream.latency, flush=lambda: stream.tail
+        )
+
+    def _should_stream_file(self, sound_path):
+        """
+        Prüft, ob eine Datei zu lang zum vollständigen Dekodieren ist
+
+        Nur mit Mixer-Backends; Sounds aus der Sound-Bank liegen bereits
+        dekodiert vor und werden nie gestreamt.
+        """
+        if not self.stream_threshold or self.backend.channels is None:
+            return False
+        if self.sample_cache._from_bank(sound_path) is not None:
+            return False
+
+        file_key = SampleCache.file_key(sound_path)
+        duration = self._durations.get(file_key)
+        if duration is None:
+            # Nur der Dateikopf wird gelesen
+            duration = self._durations[file_key] = sf.info(str(sound_path)).duration
+        return duration > self.stream_threshold
+
+    def _create_file_stream_voice(self, sound_path, sound_file):
+        """Erzeugt eine Stimme, die die Datei während der Wiedergabe dekodiert"""
+        process = None
+        stream = None
+        params = self.effects.snapshot()
+        if any(self.effects.get_effect_value(name, params) > 0 for name in params):
+            if self.effects.supports_streaming(params):
+                stream = self.effects.create_stream(
+                    self.backend.sample_rate, self.backend.channels, params,
+                    block_size=self.block_size)
+                process = stream.process
+            else:
+                logging.warning(f"Effekte für {sound_file} nicht blockweise möglich, spiele ohne")
+        return StreamingFileVoice(
+            sound_path, 0, self.backend.sample_rate, self.backend.channels,
+            read_ahead=self.stream_read_ahead, block_size=self.block_size,
+            process=process, gain=self.ingest.gain_for(sound_path) if self.ingest else 1.0,
+            sound_file=sound_file,
+            latency=stream.latency if stream is not None else 0,
+            flush=(lambda: stream.tail) if stream is not None else None
+        )
+
+    def load(self, sound_file, trace=None):
+        """
+        Bereitet einen Sound zum Abspielen vor (Dekodieren und Effekte)
+
+        Threadsicher und damit auch außerhalb des GUI-Threads nutzbar.
+
+        :param trace: Optionaler latency.Trace des Auslösers
+
+        :return: (audio_data oder Voice, sample_rate, sound_file) oder None
+        """
+        sound_path = self._resolve(sound_file)
+        
+        if not sound_path.exists():
+            logging.error(f"Audiodatei nicht gefunden: {sound_path}")
+            return None
             
-            # Wähle nächsten verfügbaren Player
-            player = self.players[self.current_player]
-            self.current_player = (self.current_player + 1) % len(self.players)
+        if self._should_stream_file(sound_path):
+            # Dekodieren und Effekte laufen im Lese-Thread der Stimme und
+            # zählen damit zur Ausgabe-Stufe
+            voice = self._create_file_stream_voice(sound_path, sound_file)
+            return voice, self.backend.sample_rate, sound_file
             
-            # Spiele Sound ab
-            player.setMedia(QMediaContent(QUrl.fromLocalFile(str(temp_path))))
-            player.play()
+        if self._can_stream():
+            voice = self._create_stream_voice(sound_path, sound_file, trace)
+            self._mark(trace, 'effects')
+            return voice, self.backend.sample_rate, sound_file
+        
+        # Lade und verarbeite Audio
+        processed, sample_rate = self.render(sound_path, trace)
+        return processed, sample_rate, sound_file
+
+    def start(self, prepared, channel=0, **voice_options):
+        """
+        Startet einen mit load() vorbereiteten Sound
+
+        Beim QMediaPlayer-Backend nur aus dem GUI-Thread aufrufen.
+
+        :param voice_options: key, choke_group, retrigger (siehe voice_options())
+        :return: Die Stimme im Mixer oder None (QMediaPlayer)
+        """
+        audio_data, sample_rate, sound_file = prepared
+        return self.backend.play(audio_data, sample_rate, sound_file, bus=channel, **voice_options)
+
+    @staticmethod
+    def discard(prepared):
+        """Verwirft einen mit load() vorbereiteten, nicht gestarteten Sound"""
+        if prepared is not None and isinstance(prepared[0], Voice):
+            prepared[0].stop()
+
+    @staticmethod
+    def voice_options(key, button_config=None):
+        """
+        Liest Choke-Gruppe und Retrigger-Modus aus einem Button-Eintrag
+
+        :param key: Schlüssel des Buttons bzw. GPIO-Pins
+        """
+        button_config = button_config or {}
+        return {
+            'key': key,
+            'choke_group': button_config.get('choke_group'),
+            'retrigger': button_config.get('retrigger', 'overlap')
+        }
+
+    def is_playing(self, key):
+        """Prüft, ob ein Sound des Buttons noch spielt (nur mit Mixer)"""
+        mixer = getattr(self.backend, 'mixer', None)
+        return mixer.is_playing(key) if mixer else False
+
+    def get_voice_stats(self):
+        """Liefert aktive, gestohlene und unterdrückte Stimmen (nur mit Mixer)"""
+        mixer = getattr(self.backend, 'mixer', None)
+        return mixer.get_stats() if mixer else {}
+
+    def play(self, sound_file, channel=0, trace=None, **voice_options):
+        """
+        Spielt eine Audiodatei ab
+        
+        :param sound_file: Dateiname im sounds-Verzeichnis
+        :param channel: Mixer-Kanal (0-3), dessen Regler den Sound steuert
+        :param trace: Optionaler latency.Trace, wird nach dem Start abgeschlossen
+        :return: Die Stimme im Mixer oder None
+        """
+        try:
+            prepared = self.load(sound_file, trace)
+            if prepared is not None:
+                voice = self.start(prepared, channel, **voice_options)
+                if trace is not None:
+                    trace.mark('handoff')
+                    trace.finish(voice)
+                return voice
             
         except Exception as e:
             logging.error(f"Fehler beim Abspielen von {sound_file}: {e}")
 
+    def get_cache_stats(self):
+        """Liefert die Statistiken von Sample- und Render-Cache"""
+        return {
+            'samples': self.sample_cache.get_stats(),
+            'renders': self.render_cache.get_stats()
+        }
+
     def set_volume(self, volume):
         """
         Setzt die Lautstärke (0.0 bis 1.0)
         """
         try:
             self.volume = max(0.0, min(1.0, volume))
-            volume_int = int(self.volume * 100)
-            for player in self.players:
-                player.setVolume(volume_int)
+            self.backend.set_volume(self.volume)
         except Exception as e:
             logging.error(f"Fehler beim Setzen der Lautstärke: {e}")
 
     def set_channel_volume(self, channel, volume):
         """
-        Setzt die Lautstärke für einen bestimmten Kanal
+        Setzt die Lautstärke für einen bestimmten Kanal (0 bis 100)
         """
         try:
-            if 0 <= channel < len(self.players):
-                volume_int = max(0, min(100, int(volume)))
-                self.players[channel].setVolume(volume_int)
+            gain = max(0, min(100, int(volume))) / 100.0
+            self.backend.set_bus_gain(channel, gain)
         except Exception as e:
             logging.error(f"Fehler beim Setzen der Kanal-Lautstärke: {e}")
 
+    def stop(self):
+        """Stoppt alle laufenden Sounds"""
+        try:
+            self.backend.stop()
+        except Exception as e:
+            logging.error(f"Fehler beim Stoppen der Wiedergabe: {e}")
+
+    def close(self):
+        """Gibt das Ausgabe-Backend frei"""
+        try:
+            self.backend.close()
+        except Exception as e:
+            logging.error(f"Fehler beim Schließen der Audio-Ausgabe: {e}")
+
     def toggle_effect(self, effect_name):
         """Schaltet einen Audio-Effekt ein/aus"""
         try:
             if effect_name in self.effects.effects:
-                current = self.effects.effects[effect_name]
-                key = list(current.keys())[0]  # z.B. 'amount' oder 'time'
+                current = self.effects.get_effect_value(effect_name)
                 
                 # Toggle zwischen 0 und vorherigem Wert
-                if current[key] > 0:
-                    self._previous_values[effect_name] = current[key]
-                    current[key] = 0
+                if current > 0:
+                    self._previous_values[effect_name] = current
+                    value = 0
                 else:
-                    current[key] = self._previous_values.get(effect_name, 50)
+                    value = self._previous_values.get(effect_name, 50)
+                
+                self.set_effect_param(effect_name, value)
                     
-                logging.info(f"Effekt {effect_name} auf {current[key]} gesetzt")
+                logging.info(f"Effekt {effect_name} auf {value} gesetzt")
                 
         except Exception as e:
             logging.error(f"Fehler beim Umschalten von {effect_name}: {e}") 
\ No newline at end of file
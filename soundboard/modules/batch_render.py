@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Batch-Renderer: rendert Sounds × Effekt-Presets ohne GUI
+
+Die Presets stehen in der config.json unter `effect_presets`, z.B.
+  "effect_presets": {"echo_heavy": {"echo": 80, "reverb": 30}}
+Jede Kombination wird in einem Prozess-Pool mit der Effektkette des
+Soundboards gerendert und als <Ausgabe>/<Preset>/<Sound>.wav abgelegt
+(andere Formate behalten ihre Endung: intro.mp3 -> intro.mp3.wav).
+
+Aufruf (im Verzeichnis soundboard):
+  python -m modules.batch_render --out rendered
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import soundfile as sf
+from .audio_effects import AudioEffects
+from .ingest import IngestManifest
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.flac', '.ogg')
+
+# Effektkette je Worker-Prozess (IR- und Tracker-Caches bleiben erhalten)
+_effects = None
+
+
+def _init_worker(reverb_ir, chain):
+    global _effects
+    _effects = AudioEffects(reverb_ir=reverb_ir, chain=chain)
+
+
+def render_file(sound_path, output_path, params):
+    """
+    Rendert eine Datei mit einem Parameter-Snapshot (läuft im Worker)
+
+    :return: (Dauer des Sounds in Sekunden, Rechenzeit in Sekunden)
+    """
+    started = time.perf_counter()
+    audio_data, sample_rate = sf.read(str(sound_path), dtype='float32')
+    processed = _effects.process_audio(audio_data, sample_rate, params, source_path=sound_path)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    # Eindeutig je Prozess, auch falls zwei Jobs dasselbe Ziel hätten
+    temp_path = output_path.with_name(f'tmp_{os.getpid()}_{output_path.name}')
+    sf.write(str(temp_path), processed, sample_rate, subtype='FLOAT', format='WAV')
+    os.replace(temp_path, output_path)
+    return len(audio_data) / sample_rate, time.perf_counter() - started
+
+
+def collect_library(sounds_dir):
+    """Alle Sounddateien unterhalb von sounds_dir (ohne temporäre Dateien)"""
+    sounds_dir = Path(sounds_dir)
+    return [
+        path.relative_to(sounds_dir).as_posix()
+        for path in sorted(sounds_dir.rglob('*'))
+        if path.suffix.lower() in AUDIO_EXTENSIONS and not path.name.startswith('temp_')
+    ]
+
+
+def run_batch(sounds_dir, output_dir, presets, sound_files=None, reverb_ir=None, chain=None,
+              workers=None):
+    """
+    Rendert alle Kombinationen aus Sounds und Presets
+
+    :param presets: Preset-Name -> {Effekt: Wert}
+    :param sound_files: Dateinamen relativ zu sounds_dir, Standard: alle
+    :param chain: Effektkette (audio_settings.effects_chain)
+    :return: Bericht mit Zeiten je Datei und Durchsatz
+    """
+    sounds_dir = Path(sounds_dir)
+    output_dir = Path(output_dir)
+    sound_files = sound_files or collect_library(sounds_dir)
+
+    # Presets vorab prüfen, damit Tippfehler nicht erst im Worker auffallen
+    effects = AudioEffects()
+    snapshots = {name: effects.preset_params(preset) for name, preset in presets.items()}
+
+    # Gleiche Ausgabedatei (z.B. intro.mp3 und intro.mp3.wav) -> abgelehnt
+    outputs = {}
+    targets = []
+    failed = 0
+    for sound_file in sound_files:
+        output_name = IngestManifest.output_name(sound_file)
+        if output_name.lower() in outputs:
+            logging.error(
+                f"Rendern von {sound_file} abgelehnt: gleiche Ausgabedatei wie "
+                f"{outputs[output_name.lower()]}")
+            failed += len(snapshots)
+            continue
+        outputs[output_name.lower()] = sound_file
+        targets.append((sound_file, output_name))
+
+    results = []
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(reverb_ir, chain)) as pool:
+        futures = {}
+        for preset_name, params in snapshots.items():
+            for sound_file, output_name in targets:
+                output_path = output_dir / preset_name / output_name
+                future = pool.submit(render_file, sounds_dir / sound_file, output_path, params)
+                futures[future] = (sound_file, preset_name)
+
+        for future in as_completed(futures):
+            sound_file, preset_name = futures[future]
+            try:
+                duration, seconds = future.result()
+            except Exception as e:
+                logging.error(f"Rendern von {sound_file} ({preset_name}) fehlgeschlagen: {e}")
+                failed += 1
+                continue
+            results.append({
+                'sound_file': sound_file,
+                'preset': preset_name,
+                'audio_seconds': duration,
+                'render_seconds': seconds,
+                'realtime_factor': duration / seconds if seconds > 0 else None
+            })
+            logging.info(
+                f"{preset_name}/{sound_file}: {seconds * 1000:.0f} ms "
+                f"({duration / seconds if seconds > 0 else 0:.1f}x Echtzeit)"
+            )
+
+    wall = time.perf_counter() - started
+    audio_total = sum(result['audio_seconds'] for result in results)
+    report = {
+        'files': len(results),
+        'failed': failed,
+        'wall_seconds': wall,
+        'files_per_second': len(results) / wall if wall > 0 else None,
+        'audio_seconds_per_second': audio_total / wall if wall > 0 else None,
+        'results': sorted(results, key=lambda r: (r['preset'], r['sound_file']))
+    }
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with open(output_dir / 'render_report.json', 'w') as f:
+        json.dump(report, f, indent=1)
+
+    logging.info(
+        f"Batch abgeschlossen: {len(results)} Dateien in {wall:.1f} s "
+        f"({report['files_per_second'] or 0:.1f} Dateien/s, "
+        f"{report['audio_seconds_per_second'] or 0:.1f} s Audio/s), {failed} fehlgeschlagen"
+    )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rendert Sounds mit Effekt-Presets")
+    parser.add_argument('--config', default='config.json')
+    parser.add_argument('--sounds', default='sounds', help="Verzeichnis mit den Sounddateien")
+    parser.add_argument('--out', default='rendered', help="Ausgabeverzeichnis")
+    parser.add_argument('--presets', nargs='*', help="Nur diese Presets (Standard: alle)")
+    parser.add_argument('--files', nargs='*', help="Nur diese Sounds (Standard: alle)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Anzahl Prozesse (Standard: alle CPU-Kerne)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+    presets = config.get('effect_presets', {})
+    if args.presets:
+        missing = set(args.presets) - set(presets)
+        if missing:
+            parser.error(f"Unbekannte Presets: {', '.join(sorted(missing))}")
+        presets = {name: presets[name] for name in args.presets}
+    if not presets:
+        parser.error("Keine Presets in effect_presets konfiguriert")
+
+    audio_settings = config.get('audio_settings', {})
+    run_batch(
+        args.sounds, args.out, presets, args.files,
+        reverb_ir=audio_settings.get('reverb_ir'),
+        chain=audio_settings.get('effects_chain'),
+        workers=args.workers
+    )
+
+
+if __name__ == "__main__":
+    main()
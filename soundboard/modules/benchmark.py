@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Benchmarks für Effekt-Durchsatz und Auslöse-Latenz - ohne Soundhardware
+
+Erzeugt synthetische Clips in mehreren Längen, Abtastraten und
+Kanalzahlen und misst:
+  - den Echtzeitfaktor jeder AudioEffects._apply_*-Methode
+  - die Latenz von AudioPlayer.play bis zum ersten ausgegebenen Sample
+    (Null-Backend)
+jeweils kalt (erster Aufruf) und warm (Median weiterer Aufrufe). Die
+Ergebnisse werden als JSON geschrieben und lassen sich mit einer
+gespeicherten Baseline vergleichen.
+
+Aufruf (im Verzeichnis soundboard):
+  python -m modules.benchmark --output bench.json
+  python -m modules.benchmark --baseline bench.json
+"""
+import argparse
+import inspect
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+import soundfile as sf
+import numpy as np
+from .audio_effects import AudioEffects, clear_shared_caches
+
+DEFAULT_LENGTHS = (0.5, 2.0, 10.0)
+DEFAULT_RATES = (22050, 44100, 48000)
+DEFAULT_CHANNELS = (1, 2)
+
+
+def synthetic_clip(seconds, sample_rate, channels, seed=0):
+    """
+    Stimmähnlicher Test-Clip: Grundton mit Vibrato, Obertönen und Rauschen
+
+    :return: float32-Array der Form (frames, channels)
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    f0 = 220.0 * 2 ** (0.3 * np.sin(2 * np.pi * 5 * t) / 12)
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    tone = sum(np.sin(k * phase) / k for k in range(1, 5))
+    mono = 0.25 * tone + 0.01 * rng.standard_normal(len(t))
+    data = np.repeat(mono[:, np.newaxis], channels, axis=1)
+    if channels > 1:
+        data[:, 1:] *= 0.8
+    return data.astype(np.float32)
+
+
+def clip_name(seconds, sample_rate, channels):
+    return f"{sample_rate}Hz/{channels}ch/{seconds:g}s"
+
+
+def _call_effect(effects, method, data, sample_rate, params):
+    if 'sample_rate' in inspect.signature(method).parameters:
+        return method(data, sample_rate, params)
+    return method(data, params)
+
+
+def bench_effects(lengths, rates, channel_counts, repeats=3, value=50):
+    """
+    Echtzeitfaktor jeder _apply_*-Methode
+
+    Kalt: erster Aufruf mit frischer AudioEffects-Instanz und geleerten
+    gemeinsamen Caches (IR-Partitionen, STFT-Fenster), warm: Median von
+    `repeats` weiteren Aufrufen.
+    """
+    names = sorted(
+        name[len('_apply_'):] for name, _ in inspect.getmembers(AudioEffects)
+        if name.startswith('_apply_')
+    )
+    results = {}
+    for effect_name in names:
+        for sample_rate in rates:
+            for channels in channel_counts:
+                for seconds in lengths:
+                    clip = synthetic_clip(seconds, sample_rate, channels)
+                    clear_shared_caches()
+                    effects = AudioEffects()
+                    params = effects.preset_params({effect_name: value})
+                    method = getattr(effects, f'_apply_{effect_name}')
+
+                    timings = []
+                    for _ in range(repeats + 1):
+                        data = clip.copy()
+                        started = time.perf_counter()
+                        _call_effect(effects, method, data, sample_rate, params)
+                        timings.append(time.perf_counter() - started)
+
+                    warm = statistics.median(timings[1:])
+                    results[f"{effect_name}/{clip_name(seconds, sample_rate, channels)}"] = {
+                        'cold_s': timings[0],
+                        'warm_s': warm,
+                        'realtime_factor': seconds / warm if warm > 0 else None
+                    }
+                    logging.info(
+                        f"{effect_name:<10} {clip_name(seconds, sample_rate, channels):<18} "
+                        f"kalt {timings[0] * 1000:7.1f} ms, warm {warm * 1000:7.1f} ms "
+                        f"({seconds / warm if warm > 0 else 0:.0f}x Echtzeit)"
+                    )
+    return results
+
+
+def _wait_for_output(voice, timeout=5.0):
+    """Wartet, bis der Mixer den ersten Block der Stimme ausgegeben hat"""
+    deadline = time.monotonic() + timeout
+    while voice.started is None:
+        if time.monotonic() > deadline:
+            return None
+        time.sleep(0.0005)
+    return voice.started
+
+
+def bench_play(lengths, rates, channel_counts, repeats=3, scenarios=None, block_size=512):
+    """
+    Latenz von AudioPlayer.play bis zum ersten Ausgabe-Block (Null-Backend)
+
+    Kalt: erster Aufruf je Datei (dekodieren, rendern, geleerte gemeinsame
+    Effekt-Caches), warm: Median weiterer Aufrufe (Cache-Treffer). Die Messung schließt das Warten auf
+    den nächsten Block des Taktgebers ein, wie bei einer Soundkarte; ein
+    zufälliger Versatz vor jedem Aufruf verhindert, dass die Messung im
+    Takt des Mixers einrastet.
+    """
+    from .audio import AudioPlayer
+
+    scenarios = scenarios or {
+        'dry': {'autotune': 0, 'echo': 0, 'reverb': 0, 'distortion': 0},
+        'effects': {'autotune': 50, 'echo': 50, 'reverb': 50, 'distortion': 50}
+    }
+    rng = np.random.default_rng(0)
+    results = {}
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)
+        try:
+            sounds_dir = Path('sounds')
+            sounds_dir.mkdir()
+            files = {}
+            for sample_rate in rates:
+                for channels in channel_counts:
+                    for seconds in lengths:
+                        name = f"bench_{sample_rate}_{channels}_{seconds:g}.wav"
+                        sf.write(str(sounds_dir / name),
+                                 synthetic_clip(seconds, sample_rate, channels), sample_rate)
+                        files[clip_name(seconds, sample_rate, channels)] = name
+
+            for scenario, values in scenarios.items():
+                player = AudioPlayer({
+                    'backend': 'null', 'block_size': block_size, 'stream_threshold_s': 0
+                })
+                player.set_effect_params(values)
+                period = block_size / player.backend.sample_rate
+                try:
+                    for label, sound_file in files.items():
+                        clear_shared_caches()
+                        latencies = []
+                        for _ in range(repeats + 1):
+                            time.sleep(rng.uniform(0, period))
+                            started = time.monotonic()
+                            voice = player.play(sound_file)
+                            output = _wait_for_output(voice) if voice is not None else None
+                            if output is None:
+                                raise RuntimeError(f"Keine Ausgabe für {sound_file}")
+                            latencies.append(output - started)
+                            voice.stop()
+
+                        warm = statistics.median(latencies[1:])
+                        results[f"{scenario}/{label}"] = {
+                            'cold_ms': latencies[0] * 1000,
+                            'warm_ms': warm * 1000
+                        }
+                        logging.info(
+                            f"play {scenario:<8} {label:<18} kalt {latencies[0] * 1000:7.1f} ms, "
+                            f"warm {warm * 1000:6.1f} ms"
+                        )
+                finally:
+                    player.close()
+        finally:
+            os.chdir(previous_dir)
+    return results
+
+
+def flatten(results, prefix=''):
+    """Verschachtelte Ergebnisse als {'effects.echo/...warm_s': Wert}"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def compare(results, baseline, tolerance=0.10):
+    """
+    Vergleicht Zeiten (Schlüssel auf _s bzw. _ms) mit einer Baseline
+
+    :return: Liste von (Metrik, Baseline, aktuell, Verhältnis) für alle
+             Metriken, die um mehr als `tolerance` langsamer sind
+    """
+    current = flatten({k: v for k, v in results.items() if k != 'meta'})
+    reference = flatten({k: v for k, v in baseline.items() if k != 'meta'})
+    regressions = []
+    for name, value in sorted(current.items()):
+        if not name.endswith(('_s', '_ms')) or name not in reference:
+            continue
+        base = reference[name]
+        if base > 0 and value / base > 1 + tolerance:
+            regressions.append((name, base, value, value / base))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks ohne Soundhardware")
+    parser.add_argument('--output', help="Ergebnisse als JSON speichern")
+    parser.add_argument('--baseline', help="Mit gespeicherten Ergebnissen vergleichen")
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help="Erlaubte Verlangsamung gegenüber der Baseline (Standard 0.10)")
+    parser.add_argument('--lengths', type=float, nargs='*', default=list(DEFAULT_LENGTHS))
+    parser.add_argument('--rates', type=int, nargs='*', default=list(DEFAULT_RATES))
+    parser.add_argument('--channels', type=int, nargs='*', default=list(DEFAULT_CHANNELS))
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--skip-effects', action='store_true')
+    parser.add_argument('--skip-play', action='store_true')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    results = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor()
+        }
+    }
+    if not args.skip_effects:
+        results['effects'] = bench_effects(args.lengths, args.rates, args.channels, args.repeats)
+    if not args.skip_play:
+        results['play'] = bench_play(args.lengths, args.rates, args.channels, args.repeats)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1)
+        logging.info(f"Ergebnisse gespeichert: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for name, base, value, ratio in regressions:
+            logging.warning(f"Langsamer: {name} {base:.4g} -> {value:.4g} ({ratio:.2f}x)")
+        if regressions:
+            logging.warning(f"{len(regressions)} Metriken langsamer als die Baseline")
+            sys.exit(1)
+        logging.info("Keine Verschlechterung gegenüber der Baseline")
+
+
+if __name__ == "__main__":
+    main()
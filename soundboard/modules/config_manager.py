@@ -15,15 +15,84 @@ class ConfigManager:
             "17": "play_pause",
             "27": "volume_up"
         },
+        "gpio_matrix": {
+            "rows": [],
+            "columns": [],
+            "scan_hz": 250,
+            "debounce_ms": 12,
+            "settle_us": 10
+        },
+        "keypad_actions": {},
         "audio_settings": {
             "output_device": "default",
-            "volume": 1.0
+            "backend": "auto",
+            "null_sink_dir": None,
+            "sample_rate": 44100,
+            "channels": 2,
+            "block_size": 512,
+            "effects_mode": "render",
+            "reverb_ir": None,
+            "effects_chain": [
+                {"name": "autotune", "enabled": True, "mix": 1.0},
+                {"name": "echo", "enabled": True, "mix": 1.0},
+                {"name": "reverb", "enabled": True, "mix": 1.0},
+                {"name": "distortion", "enabled": True, "mix": 1.0}
+            ],
+            "warmup_workers": 2,
+            "render_workers": 2,
+            "render_queue_size": 32,
+            "max_voices": 16,
+            "voice_steal_policy": "oldest",
+            "volume": 1.0,
+            "ingest_dir": None,
+            "sound_bank": None,
+            "stream_threshold_s": 30,
+            "stream_read_ahead_s": 2.0,
+            "sample_cache_mb": 256,
+            "render_cache_mb": 128,
+            "render_cache_step": 2
+        },
+        "effect_presets": {
+            "echo_heavy": {"echo": 80, "reverb": 30},
+            "distorted": {"distortion": 70}
+        },
+        "ingest": {
+            "target_lufs": -16.0,
+            "true_peak_db": -1.0,
+            "peak_block": 512,
+            "workers": None
+        },
+        "diagnostics": {
+            "startup_budget_ms": 3000,
+            "latency_tracking": True,
+            "latency_metrics": "logs/latency.json",
+            "latency_dump_s": 60,
+            "profiling": {
+                "enabled": False,
+                "mode": "sample",
+                "window_s": 30,
+                "sample_interval_ms": 5,
+                "slow_call_ms": 50,
+                "signal": "SIGUSR1"
+            }
+        },
+        "input_settings": {
+            "queue_size": 1024
+        },
+        "logging": {
+            "level": "INFO",
+            "max_mb": 5,
+            "backup_count": 3,
+            "json": False,
+            "rate_limit_burst": 20,
+            "rate_limit_interval_s": 10
         },
         "gui_settings": {
             "background_color": [0, 0, 0],
             "button_margin": 20,
             "font_size": 48,
-            "feedback_color": [0, 0, 255]
+            "feedback_color": [0, 0, 255],
+            "control_rate_hz": 30
         }
     }
 
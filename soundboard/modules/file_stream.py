@@ -0,0 +1,222 @@
+import logging
+import threading
+import soundfile as sf
+import numpy as np
+from .mixer import Voice, conform
+
+
+class RingBuffer:
+    """
+    Ringpuffer fester Größe für genau einen Schreiber und einen Leser
+
+    Der Leser (Audio-Callback) blockiert nie, der Schreiber (Lese-Thread)
+    wartet, bis wieder Platz ist. Schreib- und Leseposition werden jeweils
+    nur von einer Seite verändert, daher ist kein Lock nötig.
+    """
+
+    def __init__(self, capacity, channels):
+        self.capacity = max(1, int(capacity))
+        self._data = np.zeros((self.capacity, channels), dtype=np.float32)
+        self._written = 0
+        self._read = 0
+        self._space = threading.Event()
+        self._cancelled = False
+
+    @property
+    def available(self):
+        return self._written - self._read
+
+    def write(self, block):
+        """
+        Schreibt einen Block, wartet bei vollem Puffer
+
+        :return: False, wenn der Puffer währenddessen abgebrochen wurde
+        """
+        while len(block):
+            free = self.capacity - self.available
+            if free == 0:
+                self._space.clear()
+                if self.capacity - self.available == 0:
+                    self._space.wait(0.1)
+                if self._cancelled:
+                    return False
+                continue
+
+            count = min(free, len(block))
+            start = self._written % self.capacity
+            first = min(count, self.capacity - start)
+            self._data[start:start + first] = block[:first]
+            self._data[:count - first] = block[first:count]
+            self._written += count
+            block = block[count:]
+        return not self._cancelled
+
+    def read(self, frames):
+        """Liefert bis zu `frames` vorhandene Samples, ohne zu warten"""
+        count = min(frames, self.available)
+        start = self._read % self.capacity
+        first = min(count, self.capacity - start)
+        if first == count:
+            chunk = self._data[start:start + count].copy()
+        else:
+            chunk = np.concatenate((self._data[start:], self._data[:count - first]))
+        self._read += count
+        self._space.set()
+        return chunk
+
+    def cancel(self):
+        """Weckt einen wartenden Schreiber und beendet das Schreiben"""
+        self._cancelled = True
+        self._space.set()
+
+
+class LinearResampler:
+    """
+    Blockweise Abtastratenwandlung per linearer Interpolation
+
+    Position und letztes Sample bleiben über Blockgrenzen erhalten, so
+    entstehen an den Übergängen keine Sprünge.
+    """
+
+    def __init__(self, source_rate, target_rate, channels):
+        self.step = source_rate / target_rate
+        self.last = np.zeros((1, channels), dtype=np.float32)
+        # Position relativ zu [letztes Sample, Block...]
+        self.position = 1.0
+
+    def process(self, block):
+        if not len(block):
+            return block
+        samples = np.concatenate((self.last, block))
+        end = len(block)
+        count = max(0, int(np.ceil((end - self.position) / self.step)))
+        positions = self.position + np.arange(count) * self.step
+        index = positions.astype(np.int64)
+        fraction = (positions - index)[:, np.newaxis].astype(np.float32)
+        output = samples[index] * (1 - fraction) + samples[index + 1] * fraction
+
+        self.position += count * self.step - end
+        self.last = block[-1:]
+        return output
+
+
+class StreamingFileVoice(Voice):
+    """
+    Stimme für lange Dateien, die während der Wiedergabe dekodiert wird
+
+    Ein Lese-Thread dekodiert die Datei blockweise (soundfile.blocks),
+    bringt sie auf das Mixer-Format, schickt sie optional durch eine
+    Effektkette und füllt damit einen Ringpuffer. Die Wiedergabe beginnt,
+    sobald der erste Block bereitliegt; der Speicherbedarf ist durch die
+    Vorlaufzeit (read_ahead) begrenzt statt durch die Länge der Datei.
+    """
+
+    def __init__(self, sound_path, bus, sample_rate, channels, read_ahead=2.0,
+                 block_size=512, process=None, gain=1.0, sound_file=None,
+                 latency=0, flush=None):
+        """
+        :param read_ahead: Vorlauf des Ringpuffers in Sekunden
+        :param process: Optionale Effektkette, z.B. EffectStream.process
+        :param gain: Lineare Verstärkung (Lautheits-Normalisierung)
+        :param latency: Verzögerung der Kette in Samples, wird am Anfang verworfen
+        :param flush: Wie bei StreamVoice: Samples, die nach dem Dateiende
+                      noch durch die Kette laufen (Standard: latency)
+        """
+        super().__init__(np.zeros((0, channels), dtype=np.float32), bus, sound_file)
+        self.sound_path = sound_path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.block_size = block_size
+        self.process = process
+        self.latency = latency
+        self.flush = flush
+        self._skip = latency
+        self.gain = np.float32(gain)
+        self.underruns = 0
+        self._level = 0.0
+
+        self._ring = RingBuffer(int(read_ahead * sample_rate), channels)
+        self._eof = False
+        self._stopped = False
+        self._started = False
+        self._thread = threading.Thread(
+            target=self._run, name='FileStream', daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def level(self):
+        """Pegel der zuletzt dekodierten Blöcke"""
+        return self._level
+
+    def _run(self):
+        try:
+            with sf.SoundFile(str(self.sound_path)) as source:
+                resampler = None
+                if source.samplerate != self.sample_rate:
+                    resampler = LinearResampler(
+                        source.samplerate, self.sample_rate, self.channels)
+
+                pending = np.zeros((0, self.channels), dtype=np.float32)
+                for block in source.blocks(self.block_size, dtype='float32', always_2d=True):
+                    if self._stopped:
+                        return
+                    block = conform(block, source.samplerate, None, self.channels)
+                    if resampler is not None:
+                        block = resampler.process(block)
+
+                    # Effekte erwarten Blöcke von genau block_size Samples
+                    pending = np.concatenate((pending, block))
+                    while len(pending) >= self.block_size:
+                        if not self._emit(pending[:self.block_size]):
+                            return
+                        pending = pending[self.block_size:]
+
+                if len(pending) and not self._emit(pending):
+                    return
+
+                # Latenz und Nachhall der Effektkette ausgeben
+                if self.process is not None:
+                    remaining = self.flush() if self.flush is not None else self.latency
+                    while remaining > 0:
+                        frames = min(self.block_size, remaining)
+                        remaining -= frames
+                        silence = np.zeros((frames, self.channels), dtype=np.float32)
+                        if not self._emit(silence):
+                            return
+        except Exception as e:
+            logging.error(f"Fehler beim Streamen von {self.sound_path}: {e}")
+        finally:
+            self._eof = True
+
+    def _emit(self, block):
+        if self.gain != 1.0:
+            block = block * self.gain
+        if self.process is not None:
+            block = self.process(block)
+            if self._skip:
+                skipped = min(self._skip, len(block))
+                block = block[skipped:]
+                self._skip -= skipped
+                if not len(block):
+                    return True
+        self._level = 0.9 * self._level + 0.1 * float(np.sqrt(np.mean(np.square(block))))
+        return self._ring.write(block)
+
+    def read(self, frames):
+        chunk = self._ring.read(frames)
+        if len(chunk):
+            self._started = True
+        elif self._started and not self._eof:
+            # Der Lese-Thread kommt nicht hinterher (z.B. langsame SD-Karte)
+            self.underruns += 1
+        self.position += len(chunk)
+        return chunk
+
+    def stop(self):
+        self._stopped = True
+        self._ring.cancel()
+
+    @property
+    def finished(self):
+        return self._stopped or (self._eof and not self._ring.available)
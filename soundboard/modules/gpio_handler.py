@@ -1,24 +1,230 @@
-from gpiozero import Button
+from gpiozero import Button, DigitalInputDevice, DigitalOutputDevice
 import logging
+import threading
+import time
+import numpy as np
+
+try:
+    import lgpio
+    from gpiozero.pins.lgpio import LGPIOFactory
+except ImportError:
+    # Nur für das gebündelte Lesen mit der lgpio-Pin-Factory nötig
+    lgpio = None
+    LGPIOFactory = None
+
+
+class PinBank:
+    """
+    Liest mehrere Eingänge (Pull-up, active-low) mit einem Aufruf
+
+    Mit der lgpio-Pin-Factory werden die Pins über einen eigenen Zugriff
+    auf denselben gpiochip als Gruppe belegt und mit einem einzigen
+    group_read gelesen. Andere Factories (z.B. die MockFactory in Tests)
+    lesen die Pins einzeln.
+    """
+
+    def __init__(self, pins, pin_factory):
+        self.pins = list(pins)
+        self._handle = None
+        self._devices = []
+        if LGPIOFactory is not None and isinstance(pin_factory, LGPIOFactory):
+            self._handle = lgpio.gpiochip_open(pin_factory.chip)
+            lgpio.group_claim_input(self._handle, self.pins, lgpio.SET_PULL_UP)
+            self._weights = 1 << np.arange(len(self.pins))
+        else:
+            self._devices = [
+                DigitalInputDevice(pin, pull_up=True, pin_factory=pin_factory)
+                for pin in self.pins
+            ]
+
+    def read(self):
+        """:return: bool-Array, True für jeden gedrückten (low) Eingang"""
+        if self._handle is not None:
+            _, bits = lgpio.group_read(self._handle, self.pins[0])
+            return (bits & self._weights) == 0
+        return np.fromiter((device.value for device in self._devices), dtype=bool,
+                           count=len(self._devices))
+
+    def close(self):
+        if self._handle is not None:
+            lgpio.group_free(self._handle, self.pins[0])
+            lgpio.gpiochip_close(self._handle)
+            self._handle = None
+        for device in self._devices:
+            device.close()
+        self._devices = []
+
+
+class MatrixKeypad:
+    """
+    Tastenmatrix (Zeilen x Spalten) mit fester Abtastrate
+
+    Jede Zeile wird nacheinander auf low gezogen und alle Spalten werden als
+    Bank gelesen. Die Entprellung läuft für alle Tasten gleichzeitig als
+    Zähler (Integrator): eine Taste gilt erst als gedrückt bzw. losgelassen,
+    wenn sie `debounce_scans` Abtastungen in Folge im neuen Zustand war.
+    Gemeldet wird der Zeitpunkt, an dem der neue Zustand begann.
+    """
+
+    def __init__(self, row_pins, column_pins, on_press, on_release=None,
+                 scan_hz=250, debounce_ms=12, settle_us=10, pin_factory=None):
+        """
+        :param on_press: Wird mit (Tastennummer, Zeitstempel) aufgerufen;
+                         Tastennummer = Zeile * Spaltenzahl + Spalte
+        :param on_release: Optional, gleiche Signatur
+        :param settle_us: Wartezeit zwischen Ziehen der Zeile und Lesen der
+                          Spalten, damit die Leitungskapazität nicht noch
+                          den Zustand der vorigen Zeile liefert
+        :param pin_factory: gpiozero-Pin-Factory, z.B. MockFactory für Tests
+        """
+        self.on_press = on_press
+        self.on_release = on_release
+        self.settle = settle_us / 1e6
+        self.period = 1.0 / scan_hz
+        self.debounce_scans = max(1, round(debounce_ms / 1000 * scan_hz))
+        self.scans = 0
+
+        # Inaktive Zeilen liegen auf high, die aktive auf low
+        self._rows = [
+            DigitalOutputDevice(pin, active_high=False, initial_value=False,
+                                pin_factory=pin_factory)
+            for pin in row_pins
+        ]
+        factory = self._rows[0].pin_factory if self._rows else pin_factory
+        self._columns = PinBank(column_pins, factory)
+
+        shape = (len(row_pins), len(column_pins))
+        self._raw = np.zeros(shape, dtype=bool)
+        self._counters = np.zeros(shape, dtype=np.int16)
+        self._pressed = np.zeros(shape, dtype=bool)
+        self._changed_at = np.zeros(shape, dtype=np.float64)
+
+        self._running = False
+        self._thread = None
+
+    @property
+    def key_count(self):
+        return self._raw.size
+
+    @property
+    def pressed(self):
+        """Nummern der aktuell (entprellt) gedrückten Tasten"""
+        return [int(key) for key in np.flatnonzero(self._pressed)]
+
+    def scan_once(self):
+        """
+        Tastet die ganze Matrix einmal ab und meldet entprellte Änderungen
+
+        :return: Liste von (Tastennummer, gedrückt, Zeitstempel)
+        """
+        raw = np.empty_like(self._raw)
+        times = np.empty(len(self._rows))
+        for index, row in enumerate(self._rows):
+            row.on()
+            if self.settle:
+                # Aktiv warten: sleep() wäre für Mikrosekunden viel zu grob
+                deadline = time.perf_counter() + self.settle
+                while time.perf_counter() < deadline:
+                    pass
+            raw[index] = self._columns.read()
+            times[index] = time.monotonic()
+            row.off()
+
+        # Beginn eines neuen Rohzustands merken (für den Zeitstempel)
+        edges = raw != self._raw
+        self._changed_at = np.where(edges, times[:, np.newaxis], self._changed_at)
+        self._raw = raw
+
+        counters = self._counters + np.where(raw, 1, -1)
+        np.clip(counters, 0, self.debounce_scans, out=counters)
+        self._counters = counters
+
+        pressed = np.where(counters == self.debounce_scans, True,
+                           np.where(counters == 0, False, self._pressed))
+        changes = np.flatnonzero(pressed != self._pressed)
+        self._pressed = pressed
+        self.scans += 1
+
+        columns = raw.shape[1]
+        return [
+            (int(key), bool(pressed.flat[key]), float(self._changed_at[key // columns, key % columns]))
+            for key in changes
+        ]
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='MatrixKeypad', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        deadline = time.monotonic()
+        while self._running:
+            try:
+                for key, is_pressed, timestamp in self.scan_once():
+                    if is_pressed:
+                        self.on_press(key, timestamp)
+                    elif self.on_release is not None:
+                        self.on_release(key, timestamp)
+            except Exception as e:
+                logging.error(f"Fehler beim Abtasten der Tastenmatrix: {e}")
+            deadline += self.period
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Abtastung dauert länger als die Periode - nicht aufholen
+                deadline = time.monotonic()
+
+    def close(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        for row in self._rows:
+            row.close()
+        self._columns.close()
+
 
 class GPIOHandler:
-    def __init__(self, gpio_pins, callback):
+    def __init__(self, gpio_pins, callback, matrix=None, keypad_callback=None, pin_factory=None):
         """
         Initialisiert die GPIO-Pins für Tasteneingang
-        
+
         :param gpio_pins: Liste der GPIO-Pin-Nummern
-        :param callback: Funktion die bei Tastendruck aufgerufen wird
+        :param callback: Funktion die bei Tastendruck mit (Pin, Zeitstempel)
+                         aufgerufen wird
+        :param matrix: Optional Einstellungen einer Tastenmatrix (gpio_matrix):
+                       rows, columns, scan_hz, debounce_ms, settle_us
+        :param keypad_callback: Wird bei Druck einer Matrix-Taste mit
+                                (Tastennummer, Zeitstempel) aufgerufen
+        :param pin_factory: gpiozero-Pin-Factory, z.B. MockFactory für Tests
         """
         self.buttons = {}
+        self.keypad = None
         try:
             for pin in gpio_pins:
                 # Pull-up Widerstand aktiviert, Button ist active-low
-                button = Button(pin, pull_up=True, bounce_time=0.05)
-                button.when_pressed = lambda p=pin: callback(p)
+                button = Button(pin, pull_up=True, bounce_time=0.05, pin_factory=pin_factory)
+                # Zeitstempel der Flanke für die Latenz-Messung
+                button.when_pressed = lambda p=pin: callback(p, time.monotonic())
                 self.buttons[pin] = button
-                
+
             logging.info(f"GPIO-Handler initialisiert für Pins: {gpio_pins}")
-            
+
+            if matrix and matrix.get('rows') and matrix.get('columns'):
+                self.keypad = MatrixKeypad(
+                    matrix['rows'], matrix['columns'], keypad_callback,
+                    scan_hz=matrix.get('scan_hz', 250),
+                    debounce_ms=matrix.get('debounce_ms', 12),
+                    settle_us=matrix.get('settle_us', 10),
+                    pin_factory=pin_factory
+                )
+                self.keypad.start()
+                logging.info(
+                    f"Tastenmatrix mit {self.keypad.key_count} Tasten aktiv "
+                    f"({matrix.get('scan_hz', 250)} Hz)"
+                )
+
         except Exception as e:
             logging.error(f"Fehler bei GPIO-Initialisierung: {e}")
             raise
@@ -28,8 +234,10 @@ class GPIOHandler:
         Gibt die GPIO-Ressourcen frei
         """
         try:
+            if self.keypad is not None:
+                self.keypad.close()
             for button in self.buttons.values():
                 button.close()
             logging.info("GPIO-Ressourcen freigegeben")
         except Exception as e:
-            logging.error(f"Fehler beim GPIO-Cleanup: {e}") 
\ No newline at end of file
+            logging.error(f"Fehler beim GPIO-Cleanup: {e}")
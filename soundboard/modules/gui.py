@@ -1,17 +1,42 @@
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QPushButton, QGridLayout, 
                             QVBoxLayout, QHBoxLayout, QSlider, QLabel)
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QPalette, QColor, QFont
 import logging
 
 class SoundboardGUI(QMainWindow):
+    # Vordefinierte Button-Konfiguration, Einträge aus config['buttons'] überschreiben sie
+    DEFAULT_BUTTONS = {
+        '0': {'text': 'Sound 1', 'type': 'sound', 'action': 'sound1.wav'},
+        '1': {'text': 'Sound 2', 'type': 'sound', 'action': 'sound2.wav'},
+        '2': {'text': 'Play', 'type': 'play', 'action': 'play'},
+        '3': {'text': 'Stop', 'type': 'stop', 'action': 'stop'},
+        '4': {'text': 'Auto', 'type': 'autotune', 'action': 'autotune'},
+        '5': {'text': 'Echo', 'type': 'effect', 'action': 'echo'},
+        '6': {'text': 'Rev', 'type': 'effect', 'action': 'reverb'},
+        '7': {'text': 'Dist', 'type': 'effect', 'action': 'distortion'}
+    }
+
     def __init__(self, button_callback, config):
-        """Initialisiert die Qt-basierte GUI"""
+        """
+        Initialisiert die Qt-basierte GUI
+
+        :param button_callback: Wird bei Klick mit der Button-ID aufgerufen
+        """
         super().__init__()
         self.button_callback = button_callback
         self.audio_player = None  # Wird später gesetzt
+        self.latency = None  # Wird später gesetzt
         self.config = config
         
+        # Effekt-Regler werden gesammelt und mit fester Rate übernommen
+        self._pending_effects = {}
+        control_rate = config.get('gui_settings', {}).get('control_rate_hz', 30)
+        self._effect_timer = QTimer(self)
+        self._effect_timer.setSingleShot(True)
+        self._effect_timer.setInterval(max(1, int(1000 / max(1, control_rate))))
+        self._effect_timer.timeout.connect(self._flush_effect_changes)
+        
         # Farben für das Design
         self.button_colors = {
             'default': QColor(255, 255, 255),  # Weiß
@@ -29,9 +54,21 @@ class SoundboardGUI(QMainWindow):
             logging.error(f"Fehler bei GUI-Initialisierung: {e}")
             raise
 
+    @classmethod
+    def button_layout(cls, config):
+        """Button-ID -> Eintrag (Text, Typ, Aktion, ...) aus Vorgaben und Konfiguration"""
+        layout = {button_id: dict(entry) for button_id, entry in cls.DEFAULT_BUTTONS.items()}
+        for button_id, entry in config.get('buttons', {}).items():
+            layout[str(button_id)] = {**layout.get(str(button_id), {}), **entry}
+        return layout
+
     def set_audio_player(self, audio_player):
         """Setzt die Referenz zum AudioPlayer"""
         self.audio_player = audio_player
+        
+        # Kanal-Lautstärken an die Regler-Stellung angleichen
+        for channel, slider in enumerate(self.channel_sliders):
+            self.audio_player.set_channel_volume(channel, slider.value())
 
     def init_ui(self):
         """Initialisiert die Benutzeroberfläche"""
@@ -51,17 +88,7 @@ class SoundboardGUI(QMainWindow):
         grid = QGridLayout(left_widget)
         grid.setSpacing(5)  # Geringerer Abstand zwischen Buttons
         
-        # Vordefinierte Button-Konfiguration
-        button_configs = {
-            '0': {'text': 'Sound 1', 'type': 'sound', 'action': 'sound1.wav'},
-            '1': {'text': 'Sound 2', 'type': 'sound', 'action': 'sound2.wav'},
-            '2': {'text': 'Play', 'type': 'play', 'action': 'play'},
-            '3': {'text': 'Stop', 'type': 'stop', 'action': 'stop'},
-            '4': {'text': 'Auto', 'type': 'autotune', 'action': 'autotune'},
-            '5': {'text': 'Echo', 'type': 'effect', 'action': 'echo'},
-            '6': {'text': 'Rev', 'type': 'effect', 'action': 'reverb'},
-            '7': {'text': 'Dist', 'type': 'effect', 'action': 'distortion'}
-        }
+        button_configs = self.button_layout(self.config)
         
         # Erstelle Buttons
         button_font = QFont()
@@ -76,11 +103,11 @@ class SoundboardGUI(QMainWindow):
                     'action': None
                 })
                 
-                button = QPushButton(config['text'])
+                button = QPushButton(config.get('text', f'B{int(button_id) + 1}'))
                 button.setFont(button_font)
                 button.setMinimumSize(120, 80)
                 
-                color = self.button_colors[config['type']]
+                color = self.button_colors.get(config.get('type'), self.button_colors['default'])
                 style = f"""
                     QPushButton {{
                         background-color: {color.name()};
@@ -95,8 +122,8 @@ class SoundboardGUI(QMainWindow):
                 """
                 button.setStyleSheet(style)
                 
-                # Speichere action in button.property
-                button.setProperty('action', config['action'])
+                # Die Aktion löst der InputDispatcher über die Button-ID auf
+                button.setProperty('button_id', button_id)
                 button.clicked.connect(lambda checked, b=button: self._handle_button_click(b))
                 
                 grid.addWidget(button, row, col)
@@ -111,7 +138,8 @@ class SoundboardGUI(QMainWindow):
         mixer_layout = QHBoxLayout(mixer_widget)
         mixer_layout.setSpacing(2)  # Sehr geringer Abstand
         
-        # Erstelle 4 Lautstärkeregler
+        # Erstelle 4 Lautstärkeregler (je ein Mixer-Kanal)
+        self.channel_sliders = []
         for i in range(4):
             slider_container = QWidget()
             slider_layout = QVBoxLayout(slider_container)
@@ -153,6 +181,8 @@ class SoundboardGUI(QMainWindow):
             # Verbinde Slider mit Audio-Funktionen
             slider.valueChanged.connect(lambda v, ch=i, l=level: self._handle_volume_change(ch, v, l))
             
+            self.channel_sliders.append(slider)
+            
             slider_layout.addWidget(label)
             slider_layout.addWidget(slider)
             slider_layout.addWidget(level)
@@ -208,6 +238,24 @@ class SoundboardGUI(QMainWindow):
         
         right_layout.addWidget(effects_widget)
         
+        # Fortschritt beim Vorladen der Sounds
+        self.warmup_label = QLabel("")
+        self.warmup_label.setFont(button_font)
+        self.warmup_label.setStyleSheet("color: #888888;")
+        self.warmup_label.setAlignment(Qt.AlignCenter)
+        right_layout.addWidget(self.warmup_label)
+        
+        # Verstecktes Diagnose-Panel (F12) mit den Latenz-Perzentilen
+        self.diagnostics_label = QLabel(self)
+        self.diagnostics_label.setFont(QFont('Monospace', 10))
+        self.diagnostics_label.setStyleSheet(
+            "color: #00ff00; background-color: rgba(0, 0, 0, 220); padding: 10px;")
+        self.diagnostics_label.setAlignment(Qt.AlignTop | Qt.AlignLeft)
+        self.diagnostics_label.hide()
+        self._diagnostics_timer = QTimer(self)
+        self._diagnostics_timer.setInterval(1000)
+        self._diagnostics_timer.timeout.connect(self._update_diagnostics)
+        
         # Layout-Verhältnis anpassen
         main_layout.addWidget(left_widget, stretch=7)  # 70%
         main_layout.addWidget(right_widget, stretch=3) # 30%
@@ -217,13 +265,73 @@ class SoundboardGUI(QMainWindow):
         palette.setColor(QPalette.Window, QColor(0, 0, 0))
         self.setPalette(palette)
 
+    def show_warmup_progress(self, done, total):
+        """Zeigt den Fortschritt beim Vorladen der Sounds an"""
+        if done < total:
+            self.warmup_label.setText(f"Lade Sounds {done}/{total}")
+        else:
+            self.warmup_label.setText("")
+
     def keyPressEvent(self, event):
         """Behandelt Tastatureingaben"""
         if event.key() == Qt.Key_Escape:
             self.close()
+        elif event.key() == Qt.Key_F12:
+            self._toggle_diagnostics()
         else:
             super().keyPressEvent(event)
 
+    def _toggle_diagnostics(self):
+        """Blendet das Diagnose-Panel ein oder aus"""
+        if self.diagnostics_label.isVisible():
+            self._diagnostics_timer.stop()
+            self.diagnostics_label.hide()
+            return
+        self.diagnostics_label.setGeometry(self.rect())
+        self._update_diagnostics()
+        self.diagnostics_label.show()
+        self.diagnostics_label.raise_()
+        self._diagnostics_timer.start()
+
+    def _update_diagnostics(self):
+        """Zeigt p50/p95/p99 je Stufe und die langsamsten Auslöser"""
+        if self.latency is None:
+            self.diagnostics_label.setText("Latenz-Messung deaktiviert")
+            return
+
+        summary = self.latency.summary()
+
+        def fmt(value):
+            return f"{value:8.1f}" if value is not None else "       -"
+
+        lines = [f"{'Stufe':<10}{'Anzahl':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"]
+        for stage, stats in summary['stages'].items():
+            lines.append(
+                f"{stage:<10}{stats['count']:>8} {fmt(stats['p50_ms'])} "
+                f"{fmt(stats['p95_ms'])} {fmt(stats['p99_ms'])}"
+            )
+        lines += ["", f"Langsamste Auslöser (p95), verworfen: {summary['dropped']}"]
+        if summary['outcomes']:
+            lines[-1] += " (" + ", ".join(
+                f"{outcome} {stats['count']}" for outcome, stats in summary['outcomes'].items()
+            ) + ")"
+        slowest = sorted(
+            summary['triggers'].items(), key=lambda item: item[1]['p95_ms'] or 0, reverse=True)
+        for name, stats in slowest[:10]:
+            lines.append(
+                f"{name:<16}{stats['count']:>6} {fmt(stats['p50_ms'])} "
+                f"{fmt(stats['p95_ms'])} {fmt(stats['p99_ms'])}"
+            )
+        hid = summary['metrics'].get('hid')
+        if hid:
+            latency = hid['send_latency']
+            lines += ["", (
+                f"HID: Queue {hid['queue_depth']}, gesendet {hid['sent']}, "
+                f"zusammengefasst {hid['coalesced']}, verworfen {hid['dropped']}, "
+                f"p95 {fmt(latency['p95_ms']).strip()} ms"
+            )]
+        self.diagnostics_label.setText("\n".join(lines))
+
     def _handle_volume_change(self, channel, value, label):
         """Verarbeitet Änderungen der Kanal-Lautstärke"""
         if self.audio_player:
@@ -233,42 +341,21 @@ class SoundboardGUI(QMainWindow):
     def _handle_effect_change(self, effect_index, value):
         """Verarbeitet Änderungen der Effekt-Parameter"""
         if self.audio_player and effect_index in self.effect_names:
-            effect_name = self.effect_names[effect_index]
-            self.audio_player.set_effect_param(effect_name, value)
+            # Nur vormerken - jeder Slider-Schritt würde sonst einen neuen
+            # Snapshot erzeugen und den Render-Cache invalidieren
+            self._pending_effects[self.effect_names[effect_index]] = value
+            if not self._effect_timer.isActive():
+                self._effect_timer.start()
+
+    def _flush_effect_changes(self):
+        """Übernimmt alle seit dem letzten Takt geänderten Effekt-Werte"""
+        if self._pending_effects and self.audio_player:
+            values, self._pending_effects = self._pending_effects, {}
+            self.audio_player.set_effect_params(values)
 
     def _handle_button_click(self, button):
-        """Verarbeitet Button-Klicks"""
+        """Meldet den Klick als Eingabe-Ereignis (siehe InputBus)"""
         try:
-            action = button.property('action')
-            if action:
-                if action.endswith(('.wav', '.mp3')):
-                    # Spiele Sound ab
-                    if self.audio_player:
-                        self.audio_player.play(action)
-                elif action in ['play', 'stop']:
-                    # Mediensteuerung
-                    if self.audio_player:
-                        if action == 'play':
-                            self.hid_device.send_command(0x01)  # Play/Pause
-                            self.audio_player.play(None)
-                        else:
-                            self.hid_device.send_command(0x04)  # Stop
-                            self.audio_player.stop()
-                elif action in ['autotune', 'echo', 'reverb', 'distortion']:
-                    # Toggle Effekt
-                    if self.audio_player:
-                        self.audio_player.toggle_effect(action)
-                        # Sende entsprechenden HID-Befehl
-                        if action == 'autotune':
-                            self.hid_device.send_command(0x10)
-                        elif action == 'echo':
-                            self.hid_device.send_command(0x11)
-                        elif action == 'reverb':
-                            self.hid_device.send_command(0x12)
-                        elif action == 'distortion':
-                            self.hid_device.send_command(0x13)
-                
-                logging.info(f"Button-Aktion ausgeführt: {action}")
-                
+            self.button_callback(button.property('button_id'))
         except Exception as e:
-            logging.error(f"Fehler bei Button-Verarbeitung: {e}") 
\ No newline at end of file
+            logging.error(f"Fehler bei Button-Verarbeitung: {e}")
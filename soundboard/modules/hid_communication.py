@@ -1,7 +1,11 @@
 import usb.core
 import usb.util
 import logging
-from time import sleep
+import threading
+import time
+from collections import deque
+from .latency import LatencyHistogram
+
 
 class HIDCommunication:
     # Standard HID Keyboard Modifiers
@@ -9,18 +13,68 @@ class HIDCommunication:
     MODIFIER_CTRL  = 0x01
     MODIFIER_SHIFT = 0x02
     MODIFIER_ALT   = 0x04
-    
-    def __init__(self, vendor_id=0x0483, product_id=0x5750):
+
+    # Mapping von Befehlen zu HID-Codes
+    COMMANDS = {
+        "play_pause": (MODIFIER_NONE, [0x2C]),  # Leertaste
+        "volume_up": (MODIFIER_NONE, [0x80]),   # Volume Up
+        "volume_down": (MODIFIER_NONE, [0x81])  # Volume Down
+    }
+
+    def __init__(self, vendor_id=0x0483, product_id=0x5750, device=None, queue_size=64,
+                 hold_time=0.05, max_repeat=10):
         """
         Initialisiert die USB HID-Kommunikation
-        
+
+        Befehle werden von einem eigenen Schreib-Thread gesendet, der
+        Aufrufer (Dispatcher im GUI-Thread) wartet nie auf USB oder auf die
+        Haltezeit einer Taste.
+
         :param vendor_id: USB Vendor ID
         :param product_id: USB Product ID
+        :param device: Bereits geöffnetes Gerät mit ctrl_transfer(), z.B. eine
+                       Attrappe für Tests; sonst wird per pyusb gesucht
+        :param queue_size: Höchstzahl wartender Befehle
+        :param hold_time: Sekunden zwischen Drücken und Loslassen
+        :param max_repeat: Höchstzahl gleicher Befehle in einem Queue-Eintrag
         """
+        self.queue_size = queue_size
+        self.hold_time = hold_time
+        self.max_repeat = max_repeat
+
+        # Reports einmalig vorbereiten
+        self._reports = {
+            command: self._build_report(modifier, keycodes)
+            for command, (modifier, keycodes) in self.COMMANDS.items()
+        }
+        self._release = self._build_report(self.MODIFIER_NONE, [])
+
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.send_latency = LatencyHistogram()
+
+        if device is not None:
+            self.device = device
+            self.emulation_mode = False
+        else:
+            self._find_device(vendor_id, product_id)
+
+        if not self.emulation_mode:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='HIDWriter', daemon=True)
+            self._thread.start()
+
+    def _find_device(self, vendor_id, product_id):
         try:
             # Finde das USB-Gerät
             self.device = usb.core.find(idVendor=vendor_id, idProduct=product_id)
-            
+
             if self.device is None:
                 logging.info("HID-Gerät nicht gefunden - Offline-Modus aktiv")
                 self.emulation_mode = True
@@ -33,63 +87,114 @@ class HIDCommunication:
                 except usb.core.USBError as e:
                     logging.warning(f"Konnte HID-Gerät nicht konfigurieren: {e}")
                     self.emulation_mode = True
-            
+
         except Exception as e:
             logging.info(f"HID-Kommunikation nicht verfügbar: {e}")
             self.emulation_mode = True
 
+    @staticmethod
+    def _build_report(modifier, keycodes):
+        """Standard HID Keyboard Report: Modifier, reserviert, 6 Keycodes"""
+        return bytes([modifier, 0] + list(keycodes) + [0] * (6 - len(keycodes)))
+
     def send_command(self, command):
         """
-        Sendet einen Befehl als HID-Tastenkombination
-        
+        Reiht einen Befehl als HID-Tastenkombination ein (blockiert nicht)
+
+        Folgt ein Befehl einem gleichen, noch wartenden Befehl (z.B. mehrfach
+        volume_up), wird er mit diesem zusammengefasst.
+
         :param command: String mit dem Befehl (z.B. "play_pause")
+        :return: True wenn der Befehl eingereiht wurde
         """
-        try:
-            if self.emulation_mode:
-                logging.debug(f"Offline-Modus: HID-Befehl {command} ignoriert")
+        if self.emulation_mode:
+            logging.debug(f"Offline-Modus: HID-Befehl {command} ignoriert")
+            return False
+
+        report = self._reports.get(command)
+        if report is None:
+            logging.warning(f"Unbekannter Befehl: {command}")
+            return False
+
+        with self._condition:
+            if (self._queue and self._queue[-1][0] == command
+                    and self._queue[-1][2] < self.max_repeat):
+                self._queue[-1][2] += 1
+                self.coalesced += 1
+                return True
+            if len(self._queue) >= self.queue_size:
+                self.dropped += 1
+                logging.warning(f"HID-Queue voll, verwerfe {command}")
+                return False
+            # [Befehl, Report, Anzahl, Zeitpunkt des Einreihens]
+            self._queue.append([command, report, 1, time.monotonic()])
+            self._condition.notify()
+        return True
+
+    @property
+    def queue_depth(self):
+        return len(self._queue)
+
+    def get_stats(self):
+        """Queue-Tiefe, Zähler und Sende-Latenz (Einreihen bis Report gesendet)"""
+        return {
+            'queue_depth': self.queue_depth,
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'offline': self.emulation_mode,
+            'send_latency': self.send_latency.summary()
+        }
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._queue:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                command, report, count, queued_at = self._queue.popleft()
+
+            try:
+                for repeat in range(count):
+                    self._send_keyboard_report(report)
+                    if repeat == 0:
+                        self.send_latency.record(time.monotonic() - queued_at)
+                    # Haltezeit auf diesem Thread, dann Loslassen
+                    time.sleep(self.hold_time)
+                    self._send_keyboard_report(self._release)
+                    if repeat + 1 < count:
+                        time.sleep(self.hold_time)
+                self.sent += count
+            except Exception as e:
+                logging.warning(f"HID-Befehl {command} konnte nicht gesendet werden: {e}")
+                # Schalte in Offline-Modus bei Fehlern
+                with self._condition:
+                    self.emulation_mode = True
+                    self._running = False
+                    self._queue.clear()
                 return
-                
-            # Mapping von Befehlen zu HID-Codes
-            command_mapping = {
-                "play_pause": ([self.MODIFIER_NONE], [0x2C]),  # Leertaste
-                "volume_up": ([self.MODIFIER_NONE], [0x80]),   # Volume Up
-                "volume_down": ([self.MODIFIER_NONE], [0x81])  # Volume Down
-            }
-            
-            if command in command_mapping:
-                modifiers, keycodes = command_mapping[command]
-                self._send_keyboard_report(modifiers, keycodes)
-                # Kurze Verzögerung und Reset
-                sleep(0.05)
-                self._send_keyboard_report([self.MODIFIER_NONE], [0x00])
-            else:
-                logging.warning(f"Unbekannter Befehl: {command}")
-                
-        except Exception as e:
-            logging.warning(f"HID-Befehl konnte nicht gesendet werden: {e}")
-            self.emulation_mode = True  # Schalte in Offline-Modus bei Fehlern
 
-    def _send_keyboard_report(self, modifiers, keycodes):
+    def _send_keyboard_report(self, report):
         """
         Sendet einen USB HID Keyboard Report
-        
-        :param modifiers: Liste der Modifier-Bytes
-        :param keycodes: Liste der Keycode-Bytes
+
+        :param report: 8 Bytes, siehe _build_report()
         """
-        try:
-            # Standard HID Keyboard Report
-            report = [0] * 8
-            report[0] = modifiers[0]  # Modifier byte
-            report[2:8] = keycodes + [0] * (6 - len(keycodes))  # Key array
-            
-            # Sende Report
-            self.device.ctrl_transfer(
-                0x21,  # REQUEST_TYPE_CLASS | RECIPIENT_INTERFACE | ENDPOINT_OUT
-                0x09,  # SET_REPORT
-                0x200, # Report Type + Report ID
-                0,     # Interface
-                report # Report Data
-            )
-            
-        except Exception as e:
-            logging.error(f"Fehler beim Senden des Keyboard Reports: {e}") 
\ No newline at end of file
+        self.device.ctrl_transfer(
+            0x21,  # REQUEST_TYPE_CLASS | RECIPIENT_INTERFACE | ENDPOINT_OUT
+            0x09,  # SET_REPORT
+            0x200, # Report Type + Report ID
+            0,     # Interface
+            report # Report Data
+        )
+
+    def close(self):
+        """Sendet noch wartende Befehle nicht mehr und beendet den Schreib-Thread"""
+        with self._condition:
+            self._running = False
+            self._queue.clear()
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
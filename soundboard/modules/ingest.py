@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Ingest: bereitet die Sounds einmalig für die Wiedergabe auf
+
+Jede Datei wird auf Abtastrate und Kanalzahl der Ausgabe gebracht und als
+WAV im Ausgabeverzeichnis abgelegt. Daneben entsteht eine Sidecar-Datei
+(.peaks.npz) mit integrierter Lautheit (ITU-R BS.1770), True Peak, der
+daraus berechneten Verstärkung und Min/Max-Peaks je Block. Ein Manifest
+merkt sich den Stand jeder Quelldatei, erneute Läufe bearbeiten nur neue
+oder geänderte Dateien.
+
+Aufruf (im Verzeichnis soundboard):
+  python -m modules.ingest
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import soundfile as sf
+import numpy as np
+from .mixer import conform
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.flac', '.ogg')
+MANIFEST_NAME = 'ingest_manifest.json'
+SIDECAR_SUFFIX = '.peaks.npz'
+
+
+def k_weighting(sample_rate):
+    """
+    Koeffizienten des K-Filters nach BS.1770 für beliebige Abtastraten
+
+    :return: [(b, a), (b, a)] für Höhen-Shelf und Hochpass
+    """
+    # Höhen-Shelf (+4 dB ab ca. 1.5 kHz)
+    gain_db, q, fc = 4.0, 1 / np.sqrt(2), 1500.0
+    A = 10 ** (gain_db / 40)
+    w0 = 2 * np.pi * fc / sample_rate
+    alpha = np.sin(w0) / (2 * q)
+    cos_w0 = np.cos(w0)
+    shelf_b = [
+        A * ((A + 1) + (A - 1) * cos_w0 + 2 * np.sqrt(A) * alpha),
+        -2 * A * ((A - 1) + (A + 1) * cos_w0),
+        A * ((A + 1) + (A - 1) * cos_w0 - 2 * np.sqrt(A) * alpha)
+    ]
+    shelf_a = [
+        (A + 1) - (A - 1) * cos_w0 + 2 * np.sqrt(A) * alpha,
+        2 * ((A - 1) - (A + 1) * cos_w0),
+        (A + 1) - (A - 1) * cos_w0 - 2 * np.sqrt(A) * alpha
+    ]
+
+    # Hochpass (RLB-Gewichtung, ca. 38 Hz)
+    q, fc = 0.5, 38.0
+    w0 = 2 * np.pi * fc / sample_rate
+    alpha = np.sin(w0) / (2 * q)
+    cos_w0 = np.cos(w0)
+    highpass_b = [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2]
+    highpass_a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+
+    return [(shelf_b, shelf_a), (highpass_b, highpass_a)]
+
+
+def integrated_loudness(audio_data, sample_rate):
+    """
+    Integrierte Lautheit in LUFS nach ITU-R BS.1770-4
+
+    400-ms-Blöcke mit 75 % Überlappung, absolutes Gate bei -70 LUFS und
+    relatives Gate 10 LU unter der vorläufigen Lautheit. Alle Kanäle
+    werden mit 1.0 gewichtet (Mono/Stereo).
+
+    :return: Lautheit in LUFS, -inf bei Stille
+    """
+    from scipy import signal
+
+    data = audio_data if audio_data.ndim > 1 else audio_data[:, np.newaxis]
+    filtered = data.astype(np.float64)
+    for b, a in k_weighting(sample_rate):
+        filtered = signal.lfilter(b, a, filtered, axis=0)
+
+    block = int(0.4 * sample_rate)
+    hop = block // 4
+    if len(filtered) < block:
+        return float('-inf')
+
+    # Mittlere Energie je Block über kumulierte Summen
+    cumulative = np.zeros((len(filtered) + 1, filtered.shape[1]))
+    np.cumsum(filtered ** 2, axis=0, out=cumulative[1:])
+    starts = np.arange(0, len(filtered) - block + 1, hop)
+    energy = ((cumulative[starts + block] - cumulative[starts]) / block).sum(axis=1)
+
+    with np.errstate(divide='ignore'):
+        loudness = -0.691 + 10 * np.log10(energy)
+    gated = energy[loudness > -70.0]
+    if not len(gated):
+        return float('-inf')
+
+    relative_gate = -0.691 + 10 * np.log10(gated.mean()) - 10.0
+    with np.errstate(divide='ignore'):
+        gated = gated[-0.691 + 10 * np.log10(gated) > relative_gate]
+    return float(-0.691 + 10 * np.log10(gated.mean()))
+
+
+def true_peak(audio_data, sample_rate, oversampling=4):
+    """True Peak in dBTP (Spitzenwert des vierfach überabgetasteten Signals)"""
+    from scipy import signal
+
+    if not len(audio_data):
+        return float('-inf')
+    # Oberhalb von 96 kHz genügt die Abtastrate selbst
+    factor = oversampling if sample_rate < 96000 else 1
+    upsampled = signal.resample_poly(audio_data, factor, 1, axis=0) if factor > 1 else audio_data
+    peak = max(float(np.abs(upsampled).max()), float(np.abs(audio_data).max()))
+    return 20 * np.log10(peak) if peak > 0 else float('-inf')
+
+
+def peak_envelope(audio_data, block_size):
+    """Min/Max-Werte über alle Kanäle je Block (z.B. für Wellenform-Anzeigen)"""
+    data = audio_data if audio_data.ndim > 1 else audio_data[:, np.newaxis]
+    block_count = -(-len(data) // block_size)
+    padded = np.zeros((block_count * block_size, data.shape[1]), dtype=np.float32)
+    padded[:len(data)] = data
+    blocks = padded.reshape(block_count, block_size * data.shape[1])
+    return blocks.min(axis=1), blocks.max(axis=1)
+
+
+def normalization_gain(loudness, peak, target_lufs, ceiling_db):
+    """
+    Verstärkung in dB auf die Ziel-Lautheit, begrenzt durch den True Peak
+
+    Stille Dateien bleiben unverändert.
+    """
+    if not np.isfinite(loudness):
+        return 0.0
+    gain_db = target_lufs - loudness
+    if np.isfinite(peak):
+        gain_db = min(gain_db, ceiling_db - peak)
+    return float(gain_db)
+
+
+def ingest_file(source_path, output_path, sample_rate, channels, target_lufs,
+                ceiling_db, peak_block):
+    """
+    Bearbeitet eine Datei (läuft in einem Worker-Prozess)
+
+    :return: Manifest-Eintrag ohne Angaben zur Quelldatei
+    """
+    started = time.perf_counter()
+    audio_data, source_rate = sf.read(str(source_path), dtype='float32', always_2d=True)
+    audio_data = conform(audio_data, source_rate, sample_rate, channels)
+
+    loudness = integrated_loudness(audio_data, sample_rate)
+    peak = true_peak(audio_data, sample_rate)
+    gain_db = normalization_gain(loudness, peak, target_lufs, ceiling_db)
+    minimum, maximum = peak_envelope(audio_data, peak_block)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = output_path.with_name('tmp_' + output_path.name)
+    sf.write(str(temp_path), audio_data, sample_rate, subtype='FLOAT', format='WAV')
+    os.replace(temp_path, output_path)
+
+    sidecar_path = output_path.with_name(output_path.name + SIDECAR_SUFFIX)
+    temp_path = sidecar_path.with_name('tmp_' + sidecar_path.name)
+    with open(temp_path, 'wb') as f:
+        np.savez(
+            f, loudness=loudness, true_peak=peak, gain_db=gain_db,
+            peak_block=peak_block, min=minimum, max=maximum
+        )
+    os.replace(temp_path, sidecar_path)
+
+    return {
+        'loudness': loudness if np.isfinite(loudness) else None,
+        'true_peak': peak if np.isfinite(peak) else None,
+        'gain_db': gain_db,
+        'seconds': time.perf_counter() - started
+    }
+
+
+class IngestManifest:
+    """
+    Stand des Ingest-Verzeichnisses: Quelldatei -> aufbereitete Datei
+
+    Ein Eintrag gilt, solange mtime und Größe der Quelldatei sowie die
+    Ingest-Einstellungen unverändert sind.
+    """
+
+    def __init__(self, output_dir, sounds_dir='sounds'):
+        self.output_dir = Path(output_dir)
+        self.sounds_dir = Path(sounds_dir)
+        self.path = self.output_dir / MANIFEST_NAME
+        self.entries = {}
+        self._gains = {}
+        if self.path.exists():
+            with open(self.path, 'r') as f:
+                self.entries = json.load(f)
+        for name, entry in self.entries.items():
+            self._gains[str(self.output_dir / entry['output'])] = 10 ** (entry['gain_db'] / 20)
+
+    @staticmethod
+    def output_name(name):
+        """
+        Name der aufbereiteten Datei
+
+        WAV-Dateien behalten ihren Namen, andere bekommen .wav angehängt
+        (a.flac -> a.flac.wav), damit a.wav und a.flac sich nicht
+        gegenseitig überschreiben.
+        """
+        path = Path(name)
+        if path.suffix.lower() == '.wav':
+            return path.as_posix()
+        return path.with_name(path.name + '.wav').as_posix()
+
+    def is_current(self, name, settings):
+        """Prüft, ob eine Quelldatei nicht erneut bearbeitet werden muss"""
+        entry = self.entries.get(name)
+        if entry is None or entry.get('settings') != settings:
+            return False
+        try:
+            stat = (self.sounds_dir / name).stat()
+        except OSError:
+            return False
+        return (
+            entry['output'] == self.output_name(name)
+            and entry['mtime_ns'] == stat.st_mtime_ns
+            and entry['size'] == stat.st_size
+            and (self.output_dir / entry['output']).exists()
+        )
+
+    def resolve(self, name):
+        """Liefert den Pfad der aufbereiteten Datei oder None, wenn veraltet"""
+        entry = self.entries.get(name)
+        if entry is None or not self.is_current(name, entry.get('settings')):
+            return None
+        return self.output_dir / entry['output']
+
+    def gain_for(self, path):
+        """Lineare Verstärkung für eine aufbereitete Datei (1.0 wenn unbekannt)"""
+        return self._gains.get(str(path), 1.0)
+
+    def save(self):
+        """Schreibt das Manifest atomar"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+
+def run_ingest(sounds_dir, output_dir, sample_rate=44100, channels=2, target_lufs=-16.0,
+               ceiling_db=-1.0, peak_block=512, workers=None):
+    """
+    Bearbeitet alle neuen oder geänderten Dateien in einem Prozess-Pool
+
+    :return: (bearbeitet, übersprungen, fehlgeschlagen)
+    """
+    sounds_dir = Path(sounds_dir)
+    manifest = IngestManifest(output_dir, sounds_dir)
+    settings = {
+        'sample_rate': sample_rate,
+        'channels': channels,
+        'target_lufs': target_lufs,
+        'ceiling_db': ceiling_db,
+        'peak_block': peak_block
+    }
+
+    names = [
+        path.relative_to(sounds_dir).as_posix()
+        for path in sorted(sounds_dir.rglob('*'))
+        if path.suffix.lower() in AUDIO_EXTENSIONS and not path.name.startswith('temp_')
+    ]
+    # Verschiedene Quellen dürfen nie auf dieselbe Ausgabedatei zeigen
+    # (z.B. a.flac und a.flac.wav); verglichen wird ohne Groß-/Kleinschreibung,
+    # da FAT und NTFS sie nicht unterscheiden
+    outputs = {}
+    duplicates = set()
+    for name in names:
+        output = IngestManifest.output_name(name).lower()
+        if output in outputs:
+            logging.error(
+                f"Ingest von {name} abgelehnt: gleiche Ausgabedatei wie {outputs[output]}")
+            duplicates.add(name)
+        else:
+            outputs[output] = name
+
+    todo = [
+        name for name in names
+        if name not in duplicates and not manifest.is_current(name, settings)
+    ]
+    skipped = len(names) - len(todo) - len(duplicates)
+    logging.info(f"Ingest: {len(todo)} von {len(names)} Dateien zu bearbeiten")
+
+    done = 0
+    failed = len(duplicates)
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for name in todo:
+            stat = (sounds_dir / name).stat()
+            output = IngestManifest.output_name(name)
+            future = pool.submit(
+                ingest_file, sounds_dir / name, Path(output_dir) / output,
+                sample_rate, channels, target_lufs, ceiling_db, peak_block
+            )
+            futures[future] = (name, output, stat)
+
+        for future in as_completed(futures):
+            name, output, stat = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logging.error(f"Ingest von {name} fehlgeschlagen: {e}")
+                failed += 1
+                continue
+
+            seconds = result.pop('seconds')
+            manifest.entries[name] = dict(
+                result, output=output, mtime_ns=stat.st_mtime_ns, size=stat.st_size,
+                settings=settings
+            )
+            done += 1
+            logging.info(
+                f"{name}: {result['loudness'] or float('-inf'):.1f} LUFS, "
+                f"Verstärkung {result['gain_db']:+.1f} dB ({seconds:.2f} s)"
+            )
+
+    # Einträge gelöschter oder abgelehnter Quelldateien entfernen
+    for name in set(manifest.entries) - (set(names) - duplicates):
+        del manifest.entries[name]
+    manifest.save()
+
+    logging.info(
+        f"Ingest abgeschlossen: {done} bearbeitet, {skipped} unverändert, "
+        f"{failed} fehlgeschlagen ({time.perf_counter() - started:.1f} s)"
+    )
+    return done, skipped, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bereitet die Sounds für die Wiedergabe auf")
+    parser.add_argument('--config', default='config.json')
+    parser.add_argument('--sounds', default='sounds', help="Verzeichnis mit den Quelldateien")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Anzahl Prozesse (Standard: alle CPU-Kerne)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    config = {}
+    if Path(args.config).exists():
+        with open(args.config, 'r') as f:
+            config = json.load(f)
+    audio_settings = config.get('audio_settings', {})
+    ingest_settings = config.get('ingest', {})
+
+    run_ingest(
+        args.sounds,
+        audio_settings.get('ingest_dir') or 'sounds_ingested',
+        sample_rate=audio_settings.get('sample_rate', 44100),
+        channels=audio_settings.get('channels', 2),
+        target_lufs=ingest_settings.get('target_lufs', -16.0),
+        ceiling_db=ingest_settings.get('true_peak_db', -1.0),
+        peak_block=ingest_settings.get('peak_block', 512),
+        workers=args.workers or ingest_settings.get('workers')
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import logging
+import time
+from collections import deque
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+from .audio import AudioPlayer
+from .warmup import SOUND_EXTENSIONS
+
+EFFECT_NAMES = ('autotune', 'echo', 'reverb', 'distortion')
+
+# Befehlsbytes an den Windows-Client (HIDDevice) für GUI-Aktionen
+HID_DEVICE_CODES = {
+    'play': 0x01,
+    'stop': 0x04,
+    'autotune': 0x10,
+    'echo': 0x11,
+    'reverb': 0x12,
+    'distortion': 0x13
+}
+
+
+class InputEvent:
+    """Ein Tastendruck einer beliebigen Quelle ('touch', 'gpio', ...)"""
+    __slots__ = ('source', 'key', 'timestamp')
+
+    def __init__(self, source, key, timestamp):
+        self.source = source
+        self.key = key
+        self.timestamp = timestamp
+
+
+class Action:
+    """
+    Vorab aufgelöste Aktion einer Taste
+
+    kind ist 'sound', 'effect', 'play', 'stop' oder 'hid' (benannter Befehl
+    für HIDCommunication).
+    """
+    __slots__ = ('kind', 'target', 'key', 'channel', 'voice_options')
+
+    def __init__(self, kind, target, key, channel=0, voice_options=None):
+        self.kind = kind
+        self.target = target
+        self.key = key
+        self.channel = channel
+        self.voice_options = voice_options
+
+    def __repr__(self):
+        return f"Action({self.kind}, {self.target!r})"
+
+
+def compile_action(action, key, channel=0, button_config=None):
+    """Bestimmt die Art einer Aktion einmalig statt bei jedem Druck"""
+    if not action:
+        return None
+    if action.endswith(SOUND_EXTENSIONS):
+        return Action('sound', action, key, channel,
+                      AudioPlayer.voice_options(key, button_config))
+    if action in EFFECT_NAMES:
+        return Action('effect', action, key)
+    if action in ('play', 'stop'):
+        return Action(action, action, key)
+    return Action('hid', action, key)
+
+
+def compile_action_table(buttons, gpio_actions, keypad_actions=None):
+    """
+    Erstellt die Aktionstabelle (Quelle, Taste) -> Action
+
+    :param buttons: Button-ID -> Eintrag mit 'action' und optional
+                    'channel', 'choke_group', 'retrigger'
+    :param gpio_actions: Pin -> Aktion
+    :param keypad_actions: Tastennummer der Matrix -> Aktion
+    """
+    table = {}
+    for button_id, button_config in buttons.items():
+        # Ohne Angabe entspricht der Kanal der Spalte im 4x4-Raster
+        channel = button_config.get('channel', int(button_id) % 4)
+        action = compile_action(button_config.get('action'), str(button_id), channel,
+                                button_config)
+        if action is not None:
+            table[('touch', str(button_id))] = action
+    for pin, action_name in gpio_actions.items():
+        action = compile_action(action_name, f"gpio:{pin}")
+        if action is not None:
+            table[('gpio', str(pin))] = action
+    for key, action_name in (keypad_actions or {}).items():
+        action = compile_action(action_name, f"keypad:{key}")
+        if action is not None:
+            table[('keypad', str(key))] = action
+    return table
+
+
+class InputBus(QObject):
+    """
+    Gemeinsame Warteschlange für alle Eingabequellen
+
+    post() ist threadsicher und blockiert nie: das Ereignis wird an eine
+    Deque angehängt (atomar, ohne Lock). Nur wenn die Queue vorher leer
+    war, wird der Dispatcher per Signal im GUI-Thread geweckt - ein Schwall
+    von Ereignissen kostet also ein einziges Qt-Event. Bei Überlauf fällt
+    das älteste Ereignis weg.
+    """
+    pending = pyqtSignal()
+
+    def __init__(self, max_events=1024):
+        super().__init__()
+        self._events = deque(maxlen=max_events)
+        self._wake_pending = False
+        # Ohne Lock gezählt, daher nur ungefähr
+        self.dropped = 0
+
+    def post(self, source, key, timestamp=None):
+        """
+        :param timestamp: Zeitpunkt des Eingangs (time.monotonic), Standard: jetzt
+        """
+        if len(self._events) == self._events.maxlen:
+            self.dropped += 1
+        self._events.append(InputEvent(
+            source, str(key), time.monotonic() if timestamp is None else timestamp))
+        if not self._wake_pending:
+            self._wake_pending = True
+            self.pending.emit()
+
+    def drain(self, limit):
+        """Liefert bis zu `limit` Ereignisse in Eingangsreihenfolge"""
+        # Vor dem Leeren zurücksetzen: was danach kommt, weckt erneut
+        self._wake_pending = False
+        events = []
+        while len(events) < limit:
+            try:
+                events.append(self._events.popleft())
+            except IndexError:
+                break
+        return events
+
+    def __len__(self):
+        return len(self._events)
+
+
+class InputDispatcher(QObject):
+    """
+    Führt die Ereignisse des InputBus im GUI-Thread aus
+
+    Sounds gehen an den RenderScheduler, alles andere (Effekte, Stopp,
+    HID-Befehle) läuft direkt - auch QMediaPlayer wird so nur aus dem
+    GUI-Thread angesprochen.
+    """
+
+    def __init__(self, bus, table, audio_player, scheduler, warmup=None, hid_comm=None,
+                 hid_device=None, latency=None, batch_size=256):
+        """
+        :param table: Ergebnis von compile_action_table()
+        :param batch_size: Höchstzahl Ereignisse je Durchlauf, danach kommt
+                           die Ereignisschleife wieder zum Zug
+        """
+        super().__init__()
+        self.bus = bus
+        self.table = table
+        self.audio_player = audio_player
+        self.scheduler = scheduler
+        self.warmup = warmup
+        self.hid_comm = hid_comm
+        self.hid_device = hid_device
+        self.latency = latency
+        self.batch_size = batch_size
+        self.unmapped = 0
+        self._reported_drops = 0
+
+        bus.pending.connect(self._dispatch_pending, Qt.QueuedConnection)
+        # Ereignisse, die vor dem Verbinden eingegangen sind
+        if len(bus):
+            bus.pending.emit()
+
+    def _dispatch_pending(self):
+        if self.bus.dropped != self._reported_drops:
+            logging.warning(
+                f"Eingabe-Queue voll, {self.bus.dropped - self._reported_drops} Ereignisse verworfen")
+            self._reported_drops = self.bus.dropped
+        for event in self.bus.drain(self.batch_size):
+            self.dispatch(event)
+        if len(self.bus):
+            self.bus.pending.emit()
+
+    def dispatch(self, event):
+        action = self.table.get((event.source, event.key))
+        if action is None:
+            self.unmapped += 1
+            return
+
+        trace = None
+        if self.latency is not None:
+            trace = self.latency.begin(event.source, event.key, event.timestamp)
+            trace.mark('input')
+
+        try:
+            if action.kind == 'sound':
+                if self.warmup is not None:
+                    self.warmup.prioritize(action.target)
+                job = self.scheduler.submit(
+                    action.key, action.target, action.channel, action.voice_options, trace)
+                if job is None and trace is not None:
+                    # Retrigger 'ignore', der Button spielt noch
+                    trace.finish(outcome='ignored')
+                trace = None
+            elif action.kind == 'effect':
+                self.audio_player.toggle_effect(action.target)
+                self._send_device_code(action.target)
+            elif action.kind == 'stop':
+                self.audio_player.stop()
+                self._send_device_code('stop')
+            elif action.kind == 'play':
+                self._send_device_code('play')
+            elif self.hid_comm is not None:
+                self.hid_comm.send_command(action.target)
+
+            if trace is not None:
+                trace.mark('handoff')
+                trace.finish()
+            logging.info(f"Aktion ausgeführt: {action.target} ({event.source} {event.key})")
+
+        except Exception as e:
+            logging.error(f"Fehler bei Aktion {action.target} ({event.source} {event.key}): {e}")
+
+    def _send_device_code(self, name):
+        if self.hid_device is not None:
+            self.hid_device.send_command(HID_DEVICE_CODES[name])
@@ -0,0 +1,261 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+import numpy as np
+
+# Stufen eines Auslösers in zeitlicher Reihenfolge
+STAGES = ('input', 'dispatch', 'decode', 'effects', 'handoff', 'output')
+# Gründe, aus denen ein Auslöser nie erklingt
+OUTCOMES = ('superseded', 'overflow', 'ignored', 'failed', 'rejected')
+PERCENTILES = (50, 95, 99)
+
+
+class LatencyHistogram:
+    """
+    Histogramm mit logarithmischen Klassen von 10 µs bis 10 s
+
+    20 Klassen je Dekade (ca. 12 % Auflösung) - Speicher und Aufwand je
+    Messwert sind konstant, egal wie viele Auslöser gemessen werden.
+    """
+    EDGES = np.geomspace(1e-5, 10.0, 121)
+
+    def __init__(self):
+        self._counts = np.zeros(len(self.EDGES) + 1, dtype=np.int64)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def record(self, seconds):
+        index = int(np.searchsorted(self.EDGES, seconds))
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            self.maximum = max(self.maximum, seconds)
+
+    def percentile(self, q):
+        """Obergrenze der Klasse, in die das q-te Perzentil fällt (Sekunden)"""
+        with self._lock:
+            if not self.count:
+                return None
+            cumulative = np.cumsum(self._counts)
+            index = int(np.searchsorted(cumulative, q / 100 * self.count))
+            maximum = self.maximum
+        if index >= len(self.EDGES):
+            return maximum
+        return min(float(self.EDGES[index]), maximum)
+
+    def summary(self):
+        """Anzahl, Mittelwert, Maximum und Perzentile in Millisekunden"""
+        result = {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000 if self.count else None,
+            'max_ms': self.maximum * 1000
+        }
+        for q in PERCENTILES:
+            value = self.percentile(q)
+            result[f'p{q}_ms'] = value * 1000 if value is not None else None
+        return result
+
+
+class Trace:
+    """
+    Zeitstempel eines einzelnen Auslösers (Touch, GPIO oder HID)
+
+    Wird vom Eingang bis zur Ausgabe durchgereicht; jede Stufe setzt beim
+    Verlassen ihre Marke (time.monotonic). Ohne Monitor ist mark() ein
+    billiger Dictionary-Eintrag und finish() tut nichts.
+    """
+    __slots__ = ('source', 'key', 'timestamp', 'marks', '_monitor')
+
+    def __init__(self, monitor, source, key, timestamp=None):
+        self._monitor = monitor
+        self.source = source
+        self.key = key
+        self.timestamp = time.monotonic() if timestamp is None else timestamp
+        self.marks = {}
+
+    def mark(self, stage, timestamp=None):
+        self.marks[stage] = time.monotonic() if timestamp is None else timestamp
+
+    def durations(self):
+        """Dauer je erreichter Stufe in Sekunden (fehlende Stufen entfallen)"""
+        result = {}
+        previous = self.timestamp
+        for stage in STAGES:
+            if stage in self.marks:
+                result[stage] = max(0.0, self.marks[stage] - previous)
+                previous = self.marks[stage]
+        result['total'] = max(0.0, previous - self.timestamp)
+        return result
+
+    def finish(self, voice=None, outcome=None):
+        """
+        Schließt den Auslöser ab
+
+        :param voice: Gestartete Mixer-Stimme; die Ausgabe-Stufe wird dann
+                      nachgetragen, sobald der Mixer ihren ersten Block ausgibt
+        :param outcome: Grund aus OUTCOMES, wenn der Auslöser verworfen wurde
+                        (z.B. 'superseded': durch einen neueren Druck ersetzt)
+        """
+        if self._monitor is not None:
+            self._monitor.complete(self, voice, outcome)
+
+
+class LatencyMonitor:
+    """
+    Sammelt die Stufen-Dauern aller Auslöser in Histogrammen
+
+    Die Auswertung läuft in einem eigenen Thread: er trägt die Ausgabe-Stufe
+    nach, sobald der Mixer eine Stimme ausgegeben hat (der Audio-Callback
+    setzt nur Voice.started), und schreibt die Perzentile regelmäßig als
+    JSON in eine Metrik-Datei.
+    """
+
+    def __init__(self, metrics_path='logs/latency.json', dump_interval=60.0,
+                 output_latency=0.0, timeout=5.0):
+        """
+        :param dump_interval: Sekunden zwischen zwei Metrik-Dateien (0: nie)
+        :param output_latency: Puffer-Latenz der Soundkarte in Sekunden, wird
+                               zur Ausgabe-Stufe addiert
+        :param timeout: Stimmen, die so lange nicht erklingen, werden verworfen
+        """
+        self.metrics_path = Path(metrics_path) if metrics_path else None
+        self.dump_interval = dump_interval
+        self.output_latency = output_latency or 0.0
+        self.timeout = timeout
+        self.stages = {stage: LatencyHistogram() for stage in STAGES + ('total',)}
+        self.triggers = {}
+        # Grund -> Zeit vom Eingang bis zum Verwerfen
+        self.outcomes = {outcome: LatencyHistogram() for outcome in OUTCOMES}
+        self.metrics = {}
+
+        self._waiting = deque()
+        self._triggers_lock = threading.Lock()
+        self._running = False
+        self._thread = None
+
+    def add_metrics(self, name, provider):
+        """
+        Nimmt weitere Kennzahlen in die Metrik-Datei auf
+
+        :param provider: Funktion ohne Argumente, liefert ein JSON-fähiges dict
+        """
+        self.metrics[name] = provider
+
+    def begin(self, source, key, timestamp=None):
+        """
+        Beginnt die Messung eines Auslösers
+
+        :param source: 'touch', 'gpio' oder 'hid'
+        :param timestamp: Zeitpunkt des Eingangs (time.monotonic), Standard: jetzt
+        """
+        return Trace(self, source, key, timestamp)
+
+    @property
+    def dropped(self):
+        """Anzahl verworfener Auslöser aller Gründe"""
+        return sum(histogram.count for histogram in self.outcomes.values())
+
+    def complete(self, trace, voice=None, outcome=None):
+        if outcome is not None:
+            self._record_outcome(trace, outcome)
+        elif voice is not None and hasattr(voice, 'started'):
+            self._waiting.append((trace, voice))
+        else:
+            self._record(trace)
+
+    def _record(self, trace):
+        durations = trace.durations()
+        for stage, seconds in durations.items():
+            self.stages[stage].record(seconds)
+
+        name = f"{trace.source}:{trace.key}"
+        histogram = self.triggers.get(name)
+        if histogram is None:
+            with self._triggers_lock:
+                histogram = self.triggers.setdefault(name, LatencyHistogram())
+        histogram.record(durations['total'])
+
+    def _record_outcome(self, trace, outcome, timestamp=None):
+        ended = time.monotonic() if timestamp is None else timestamp
+        self.outcomes[outcome].record(max(0.0, ended - trace.timestamp))
+
+    def poll(self):
+        """Trägt die Ausgabe-Stufe für inzwischen erklungene Stimmen nach"""
+        now = time.monotonic()
+        for _ in range(len(self._waiting)):
+            trace, voice = self._waiting.popleft()
+            if voice.started is not None:
+                trace.mark('output', voice.started + self.output_latency)
+                self._record(trace)
+            elif voice.finished or now - trace.timestamp > self.timeout:
+                # Im Mixer abgelehnt (Retrigger 'ignore', Choke) oder nie gestartet
+                self._record_outcome(trace, 'rejected', now)
+            else:
+                self._waiting.append((trace, voice))
+
+    def summary(self):
+        """Perzentile je Stufe und Gesamtdauer je Auslöser in Millisekunden"""
+        with self._triggers_lock:
+            triggers = dict(self.triggers)
+        return {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'dropped': self.dropped,
+            'outcomes': {
+                outcome: histogram.summary()
+                for outcome, histogram in self.outcomes.items() if histogram.count
+            },
+            'stages': {
+                stage: histogram.summary()
+                for stage, histogram in self.stages.items() if histogram.count
+            },
+            'triggers': {
+                name: histogram.summary() for name, histogram in sorted(triggers.items())
+            },
+            'metrics': {name: provider() for name, provider in self.metrics.items()}
+        }
+
+    def dump(self):
+        """Schreibt die aktuelle Zusammenfassung atomar in die Metrik-Datei"""
+        if self.metrics_path is None:
+            return
+        self.metrics_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.metrics_path.with_name('tmp_' + self.metrics_path.name)
+        with open(temp_path, 'w') as f:
+            json.dump(self.summary(), f, indent=1)
+        os.replace(temp_path, self.metrics_path)
+
+    def start(self, poll_interval=0.05):
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, args=(poll_interval,), name='LatencyMonitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.poll()
+        try:
+            self.dump()
+        except OSError as e:
+            logging.warning(f"Latenz-Metriken konnten nicht geschrieben werden: {e}")
+
+    def _run(self, poll_interval):
+        next_dump = time.monotonic() + self.dump_interval
+        while self._running:
+            time.sleep(poll_interval)
+            self.poll()
+            if self.dump_interval and time.monotonic() >= next_dump:
+                next_dump += self.dump_interval
+                try:
+                    self.dump()
+                except OSError as e:
+                    logging.warning(f"Latenz-Metriken konnten nicht geschrieben werden: {e}")
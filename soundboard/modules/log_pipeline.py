@@ -0,0 +1,143 @@
+import atexit
+import json
+import logging
+import queue
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Begrenzt Meldungen je Aufrufstelle (Datei und Zeile)
+
+    Pro Aufrufstelle werden höchstens `burst` Meldungen je `interval`
+    Sekunden durchgelassen. Ab WARNING zählt zusätzlich der Text: nur
+    gleiche Meldungen werden gedrosselt, unterschiedliche Fehler derselben
+    Stelle kommen immer durch. Die Zahl der unterdrückten Meldungen wird an
+    die erste Meldung des nächsten Zeitfensters angehängt.
+    """
+    MAX_WINDOWS = 1000
+
+    def __init__(self, burst=20, interval=10.0):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if not self.burst:
+            return True
+        key = (record.pathname, record.lineno)
+        if record.levelno >= logging.WARNING:
+            key += (record.getMessage(),)
+        with self._lock:
+            if len(self._windows) > self.MAX_WINDOWS:
+                # Abgelaufene Fenster verwerfen (viele verschiedene Meldungstexte)
+                self._windows = {
+                    k: w for k, w in self._windows.items()
+                    if record.created - w[0] < self.interval
+                }
+            window = self._windows.get(key)
+            if window is None or record.created - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [record.created, 1, 0]
+                if suppressed:
+                    record.msg = f"{record.msg} ({suppressed} gleiche Meldungen unterdrückt)"
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+class JsonFormatter(logging.Formatter):
+    """Eine JSON-Zeile je Meldung, zur späteren Auswertung der Logs"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'thread': record.threadName,
+            'module': record.module,
+            'line': record.lineno,
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class LogPipeline:
+    """
+    Asynchrones Logging über eine Queue
+
+    Der aufrufende Thread (Button, GPIO, Audio) prüft nur Level und
+    Rate-Limit und legt die Meldung in eine Queue. Ein QueueListener
+    schreibt sie im Hintergrund in eine nach Größe rotierende Datei.
+    Bis configure() aufgerufen wird, gelten die Standardwerte.
+    """
+
+    def __init__(self, log_path, level=logging.INFO):
+        self.log_path = Path(log_path)
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.rate_limit = RateLimitFilter()
+        self.handler = QueueHandler(queue.SimpleQueue())
+        self.handler.addFilter(self.rate_limit)
+        self.listener = QueueListener(
+            self.handler.queue, self._create_file_handler({}), respect_handler_level=True)
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(self.handler)
+        self.listener.start()
+        self._running = True
+        atexit.register(self.close)
+
+    def _create_file_handler(self, settings):
+        json_lines = settings.get('json', False)
+        path = self.log_path.with_suffix('.jsonl') if json_lines else self.log_path
+        handler = RotatingFileHandler(
+            path,
+            maxBytes=int(settings.get('max_mb', 5) * 1024 * 1024),
+            backupCount=settings.get('backup_count', 3),
+            encoding='utf-8'
+        )
+        handler.setFormatter(JsonFormatter() if json_lines else logging.Formatter(LOG_FORMAT))
+        return handler
+
+    def configure(self, settings):
+        """
+        Übernimmt den Abschnitt `logging` der Konfiguration
+
+        Bereits eingereihte Meldungen werden vor dem Wechsel noch in die
+        bisherige Datei geschrieben.
+        """
+        logging.getLogger().setLevel(settings.get('level', 'INFO'))
+        self.rate_limit.burst = settings.get('rate_limit_burst', 20)
+        self.rate_limit.interval = settings.get('rate_limit_interval_s', 10.0)
+
+        if not self._running:
+            return
+        handler = self._create_file_handler(settings)
+        self.listener.stop()
+        for old in self.listener.handlers:
+            old.close()
+        self.listener.handlers = (handler,)
+        self.listener.start()
+
+    def close(self):
+        """Schreibt ausstehende Meldungen und beendet den Hintergrund-Thread"""
+        if not self._running:
+            return
+        self._running = False
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+        logging.getLogger().removeHandler(self.handler)
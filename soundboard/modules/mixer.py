@@ -0,0 +1,370 @@
+import logging
+import time
+from collections import deque
+from math import gcd
+import numpy as np
+
+
+def conform(audio_data, sample_rate, target_rate, channels):
+    """
+    Bringt Audiodaten auf Abtastrate und Kanalzahl des Mixers
+
+    :return: float32-Array der Form (frames, channels)
+    """
+    data = audio_data if audio_data.ndim > 1 else audio_data[:, np.newaxis]
+
+    if data.shape[1] != channels:
+        if data.shape[1] == 1:
+            data = np.repeat(data, channels, axis=1)
+        elif channels == 1:
+            data = data.mean(axis=1, keepdims=True)
+        else:
+            data = data[:, :channels]
+
+    if target_rate and sample_rate != target_rate:
+        # scipy nur laden, wenn tatsächlich umgerechnet werden muss
+        from scipy import signal
+        divisor = gcd(int(sample_rate), int(target_rate))
+        data = signal.resample_poly(
+            data, int(target_rate) // divisor, int(sample_rate) // divisor, axis=0
+        )
+
+    return np.ascontiguousarray(data, dtype=np.float32)
+
+
+class Voice:
+    """Ein aktuell spielender Sound im Mixer"""
+
+    def __init__(self, data, bus, sound_file=None):
+        self.data = data
+        self.position = 0
+        self.bus = bus
+        self.sound_file = sound_file
+
+        # Angaben für das Voice-Management (siehe VoiceManager)
+        self.key = None
+        self.choke_group = None
+        self.order = 0
+        self.fading = False
+        self._level = None
+
+        # Zeitpunkt (time.monotonic) des ersten ausgegebenen Blocks
+        self.started = None
+
+    @property
+    def level(self):
+        """Grober RMS-Pegel der Quelldaten (für das Stehlen der leisesten Stimme)"""
+        if self._level is None:
+            sample = self.data[::64]
+            self._level = float(np.sqrt(np.mean(np.square(sample)))) if len(sample) else 0.0
+        return self._level
+
+    def read(self, frames):
+        """Liefert die nächsten (höchstens) `frames` Samples"""
+        chunk = self.data[self.position:self.position + frames]
+        self.position += len(chunk)
+        return chunk
+
+    def stop(self):
+        """Beendet die Stimme sofort"""
+        self.position = len(self.data)
+
+    @property
+    def finished(self):
+        return self.position >= len(self.data)
+
+
+class StreamVoice(Voice):
+    """
+    Stimme, deren Samples erst beim Abspielen blockweise berechnet werden
+
+    Die Quelldaten werden in Blöcken fester Größe durch `process` geschickt
+    (z.B. EffectStream.process). Die Ausgabe beginnt nach dem ersten Block.
+    Nach dem Ende der Daten laufen noch Null-Blöcke durch die Kette, bis
+    Latenz und Nachhall ausgegeben sind; die ersten `latency` Samples der
+    Kette (Vorlauf des Pitch-Shifters) werden verworfen.
+    """
+
+    def __init__(self, data, bus, process, block_size=512, sound_file=None,
+                 latency=0, flush=None):
+        """
+        :param latency: Verzögerung der Kette in Samples (EffectStream.latency)
+        :param flush: Funktion ohne Argumente, liefert die Zahl der Samples,
+                      die nach dem Ende der Daten noch durch die Kette laufen
+                      (z.B. lambda: stream.tail); ohne Angabe nur die Latenz
+        """
+        super().__init__(data, bus, sound_file)
+        self.process = process
+        self.block_size = block_size
+        self.latency = latency
+        self.flush = flush
+        self._pending = data[:0]
+        self._skip = latency
+        # Noch durchzuschickende Null-Samples, None solange Daten übrig sind
+        self._flush_remaining = None
+
+    def _next_block(self):
+        if self.position < len(self.data):
+            block = self.data[self.position:self.position + self.block_size]
+            self.position += len(block)
+            return block
+        if self._flush_remaining is None:
+            self._flush_remaining = self.flush() if self.flush is not None else self.latency
+        if self._flush_remaining <= 0:
+            return None
+        frames = min(self.block_size, self._flush_remaining)
+        self._flush_remaining -= frames
+        return np.zeros((frames,) + self.data.shape[1:], dtype=self.data.dtype)
+
+    def read(self, frames):
+        blocks = [self._pending]
+        available = len(self._pending)
+        while available < frames:
+            block = self._next_block()
+            if block is None:
+                break
+            block = self.process(block)
+            if self._skip:
+                skipped = min(self._skip, len(block))
+                block = block[skipped:]
+                self._skip -= skipped
+            blocks.append(block)
+            available += len(block)
+
+        pending = np.concatenate(blocks) if len(blocks) > 1 else self._pending
+        self._pending = pending[frames:]
+        return pending[:frames]
+
+    def stop(self):
+        super().stop()
+        self._pending = self.data[:0]
+        self._flush_remaining = 0
+
+    @property
+    def finished(self):
+        return (
+            self.position >= len(self.data) and self._flush_remaining == 0
+            and not len(self._pending)
+        )
+
+
+class VoiceManager:
+    """
+    Polyphonie-Grenze, Voice-Stealing, Choke-Gruppen und Retrigger-Modi
+
+    Läuft im Audio-Callback, wenn neue Stimmen übernommen werden. Beendete
+    Stimmen werden nicht hart abgeschnitten, sondern über einen Block
+    ausgeblendet.
+
+    Retrigger-Modi je Button (Schlüssel):
+      - 'overlap': neue Stimme läuft zusätzlich (Standard)
+      - 'restart': laufende Stimmen desselben Buttons werden beendet
+      - 'ignore':  Druck wird ignoriert, solange der Button noch spielt
+    Steal-Policies bei erreichter Polyphonie: 'oldest', 'quietest',
+    'same_button' (älteste Stimme desselben Buttons, sonst die älteste).
+    """
+
+    RETRIGGER_MODES = ('overlap', 'restart', 'ignore')
+    STEAL_POLICIES = ('oldest', 'quietest', 'same_button')
+
+    def __init__(self, max_voices=16, steal_policy='oldest'):
+        if steal_policy not in self.STEAL_POLICIES:
+            logging.warning(f"Unbekannte Steal-Policy {steal_policy}, verwende 'oldest'")
+            steal_policy = 'oldest'
+        self.max_voices = max(1, int(max_voices))
+        self.steal_policy = steal_policy
+        self.stolen = 0
+        self.choked = 0
+        self.ignored = 0
+        self.peak_voices = 0
+        self._order = 0
+
+    def admit(self, voice, voices, retrigger='overlap'):
+        """
+        Entscheidet, ob eine neue Stimme starten darf, und blendet
+        verdrängte Stimmen aus
+
+        :param voices: Liste der aktuell spielenden Stimmen
+        :return: True, wenn die Stimme hinzugefügt werden soll
+        """
+        sounding = [v for v in voices if not v.fading and not v.finished]
+
+        if voice.key is not None:
+            same_key = [v for v in sounding if v.key == voice.key]
+            if retrigger == 'ignore' and same_key:
+                self.ignored += 1
+                return False
+            if retrigger == 'restart':
+                for other in same_key:
+                    other.fading = True
+                sounding = [v for v in sounding if not v.fading]
+
+        if voice.choke_group is not None:
+            for other in sounding:
+                if other.choke_group == voice.choke_group:
+                    other.fading = True
+                    self.choked += 1
+            sounding = [v for v in sounding if not v.fading]
+
+        while len(sounding) >= self.max_voices:
+            victim = self._select_victim(voice, sounding)
+            victim.fading = True
+            sounding.remove(victim)
+            self.stolen += 1
+
+        self._order += 1
+        voice.order = self._order
+        self.peak_voices = max(self.peak_voices, len(sounding) + 1)
+        return True
+
+    def _select_victim(self, voice, sounding):
+        if self.steal_policy == 'quietest':
+            return min(sounding, key=lambda v: v.level)
+        if self.steal_policy == 'same_button' and voice.key is not None:
+            same_key = [v for v in sounding if v.key == voice.key]
+            if same_key:
+                return min(same_key, key=lambda v: v.order)
+        return min(sounding, key=lambda v: v.order)
+
+
+class Mixer:
+    """
+    Mischt alle aktiven Stimmen in einem einzigen Ausgabepuffer
+
+    Jede Stimme läuft auf einem von mehreren Bussen (die Kanal-Regler der
+    GUI). Die Summe der Busse wird mit Bus- und Master-Verstärkung
+    gewichtet. render() wird aus dem Audio-Callback aufgerufen; neue
+    Stimmen kommen über eine Deque herein, damit Aufrufer aus anderen
+    Threads nicht auf den Callback warten müssen.
+    """
+
+    def __init__(self, sample_rate=44100, channels=2, bus_count=4, master_gain=1.0,
+                 voice_manager=None):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.bus_gains = np.ones(bus_count, dtype=np.float32)
+        self.master_gain = master_gain
+        self.voice_manager = voice_manager or VoiceManager()
+
+        self._voices = []
+        self._incoming = deque()
+        self._stop_requested = False
+        self._bus_buffer = np.zeros((bus_count, 0, channels), dtype=np.float32)
+
+    @property
+    def bus_count(self):
+        return len(self.bus_gains)
+
+    @property
+    def active_voices(self):
+        return len(self._voices) + len(self._incoming)
+
+    def is_playing(self, key):
+        """Prüft, ob eine Stimme des Schlüssels (Buttons) noch klingt"""
+        voices = list(self._voices) + [voice for voice, _ in list(self._incoming)]
+        return any(voice.key == key and not voice.fading for voice in voices)
+
+    def get_stats(self):
+        """Liefert Zähler des Voice-Managements"""
+        manager = self.voice_manager
+        return {
+            'active': self.active_voices,
+            'peak': manager.peak_voices,
+            'max_voices': manager.max_voices,
+            'stolen': manager.stolen,
+            'choked': manager.choked,
+            'ignored': manager.ignored
+        }
+
+    def add_voice(self, data, bus=0, sound_file=None, key=None, choke_group=None,
+                  retrigger='overlap'):
+        """
+        Startet eine neue Stimme
+
+        :param data: float32-Array der Form (frames, channels), siehe conform(),
+                     oder eine fertige Voice (z.B. StreamVoice)
+        :param bus: Index des Busses (0 bis bus_count - 1)
+        :param key: Button, zu dem die Stimme gehört (für Retrigger-Modi)
+        :param choke_group: Stimmen derselben Gruppe beenden sich gegenseitig
+        :param retrigger: 'overlap', 'restart' oder 'ignore'
+        """
+        bus = min(max(int(bus), 0), self.bus_count - 1)
+        if isinstance(data, Voice):
+            voice = data
+            voice.bus = bus
+        else:
+            voice = Voice(data, bus, sound_file)
+        voice.key = key
+        voice.choke_group = choke_group
+        self._incoming.append((voice, retrigger))
+        return voice
+
+    def set_bus_gain(self, bus, gain):
+        if 0 <= bus < self.bus_count:
+            self.bus_gains[bus] = max(0.0, gain)
+
+    def set_master_gain(self, gain):
+        self.master_gain = max(0.0, gain)
+
+    def stop_all(self):
+        """Beendet alle Stimmen beim nächsten Callback"""
+        self._stop_requested = True
+
+    def render(self, frames, out=None):
+        """
+        Erzeugt die nächsten `frames` Ausgabe-Samples
+
+        :param out: Optionaler Zielpuffer der Form (frames, channels)
+        """
+        if out is None:
+            out = np.empty((frames, self.channels), dtype=np.float32)
+
+        if self._stop_requested:
+            self._stop_requested = False
+            # stop() gibt auch Ressourcen frei (z.B. Lese-Threads beim Streamen)
+            for voice in self._voices:
+                voice.stop()
+            while self._incoming:
+                self._incoming.popleft()[0].stop()
+            self._voices.clear()
+
+        while self._incoming:
+            voice, retrigger = self._incoming.popleft()
+            if self.voice_manager.admit(voice, self._voices, retrigger):
+                self._voices.append(voice)
+            else:
+                voice.stop()
+
+        if not self._voices:
+            out.fill(0)
+            return out
+
+        if self._bus_buffer.shape[1] < frames:
+            self._bus_buffer = np.zeros(
+                (self.bus_count, frames, self.channels), dtype=np.float32
+            )
+        buses = self._bus_buffer[:, :frames]
+        buses.fill(0)
+
+        now = time.monotonic()
+        for voice in self._voices:
+            try:
+                chunk = voice.read(frames)
+            except Exception as e:
+                logging.error(f"Fehler in Stimme {voice.sound_file}: {e}")
+                voice.stop()
+                continue
+            if voice.fading:
+                # Verdrängte Stimme über einen Block ausblenden
+                ramp = np.linspace(1.0, 0.0, len(chunk), dtype=np.float32)
+                chunk = chunk * ramp[:, np.newaxis]
+                voice.stop()
+            buses[voice.bus, :len(chunk)] += chunk
+            if voice.started is None and len(chunk):
+                voice.started = now
+
+        self._voices = [voice for voice in self._voices if not voice.finished]
+
+        np.einsum('b,bfc->fc', self.bus_gains * self.master_gain, buses, out=out)
+        np.clip(out, -1.0, 1.0, out=out)
+        return out
@@ -0,0 +1,193 @@
+import logging
+import os
+import threading
+from pathlib import Path
+import numpy as np
+
+
+class YinPitchTracker:
+    """
+    Vektorisierter YIN-Pitch-Tracker auf Basis von NumPy-FFTs
+
+    Alle Frames eines Signals werden gemeinsam über eine Matrix berechnet
+    (track), einzelne Frames lassen sich für die blockweise Verarbeitung
+    auch direkt analysieren (track_frame).
+    """
+
+    # Frames je Analyse-Schritt in track()
+    CHUNK_FRAMES = 64
+
+    def __init__(self, sample_rate, frame_length=2048, hop_length=512,
+                 fmin=65.41, fmax=2093.0, threshold=0.15):
+        """
+        :param fmin: Tiefste erkannte Frequenz (Standard: C2)
+        :param fmax: Höchste erkannte Frequenz (Standard: C7)
+        :param threshold: YIN-Schwelle, darunter gilt ein Frame als stimmhaft
+        """
+        self.sample_rate = sample_rate
+        self.frame_length = frame_length
+        self.hop_length = hop_length
+        self.threshold = threshold
+
+        self.tau_min = max(2, int(sample_rate / fmax))
+        self.tau_max = min(int(sample_rate / fmin), frame_length // 2)
+        self.window_length = frame_length - self.tau_max
+        self.fft_size = 1 << int(np.ceil(np.log2(frame_length + self.window_length)))
+
+    def frame(self, audio_data):
+        """Zerlegt ein Mono-Signal in überlappende Frames (Form (frames, frame_length))"""
+        if len(audio_data) < self.frame_length:
+            audio_data = np.pad(audio_data, (0, self.frame_length - len(audio_data)))
+        frame_count = 1 + (len(audio_data) - self.frame_length) // self.hop_length
+        return np.lib.stride_tricks.as_strided(
+            audio_data,
+            shape=(frame_count, self.frame_length),
+            strides=(audio_data.strides[0] * self.hop_length, audio_data.strides[0]),
+            writeable=False
+        )
+
+    def track(self, audio_data):
+        """
+        Schätzt die Grundfrequenz für alle Frames
+
+        :param audio_data: Mono- oder Mehrkanal-Signal
+        :return: (f0 in Hz, voiced-Flags) je Frame, f0 ist 0 bei stimmlosen Frames
+        """
+        frame_count = 1 + max(0, len(audio_data) - self.frame_length) // self.hop_length
+
+        # In Stücken analysieren, damit der Speicherbedarf nicht mit der Länge wächst
+        results = []
+        for start in range(0, frame_count, self.CHUNK_FRAMES):
+            count = min(self.CHUNK_FRAMES, frame_count - start)
+            begin = start * self.hop_length
+            segment = audio_data[begin:begin + (count - 1) * self.hop_length + self.frame_length]
+            mono = segment.mean(axis=1) if segment.ndim > 1 else segment
+            results.append(self.track_frames(
+                self.frame(np.ascontiguousarray(mono, dtype=np.float64))))
+        return (np.concatenate([f0 for f0, _ in results]),
+                np.concatenate([voiced for _, voiced in results]))
+
+    def track_frame(self, frame):
+        """Schätzt die Grundfrequenz eines einzelnen Frames"""
+        f0, voiced = self.track_frames(np.asarray(frame, dtype=np.float64)[np.newaxis])
+        return f0[0], voiced[0]
+
+    def track_frames(self, frames):
+        """Schätzt die Grundfrequenz für eine Matrix von Frames"""
+        window = self.window_length
+        tau_count = self.tau_max + 1
+
+        # Autokorrelation r(tau) = sum x[j] * x[j + tau] über das Integrationsfenster
+        spectrum = np.fft.rfft(frames, n=self.fft_size, axis=1)
+        window_spectrum = np.fft.rfft(frames[:, :window], n=self.fft_size, axis=1)
+        acf = np.fft.irfft(spectrum * np.conj(window_spectrum), n=self.fft_size, axis=1)
+        acf = acf[:, :tau_count]
+
+        # Energie des verschobenen Fensters über kumulierte Summen
+        cumulative = np.zeros((len(frames), frames.shape[1] + 1))
+        np.cumsum(frames ** 2, axis=1, out=cumulative[:, 1:])
+        taus = np.arange(tau_count)
+        energy = cumulative[:, taus + window] - cumulative[:, taus]
+
+        # Differenzfunktion und kumulativ normierte Differenz (YIN)
+        difference = np.maximum(energy[:, :1] + energy - 2 * acf, 0)
+        running = np.cumsum(difference[:, 1:], axis=1)
+        cmnd = np.ones_like(difference)
+        cmnd[:, 1:] = difference[:, 1:] * taus[1:] / np.maximum(running, 1e-12)
+
+        # Erstes lokales Minimum unter der Schwelle im erlaubten Bereich
+        search = cmnd[:, self.tau_min:self.tau_max]
+        is_local_min = search <= cmnd[:, self.tau_min + 1:self.tau_max + 1]
+        candidates = (search < self.threshold) & is_local_min
+        voiced = candidates.any(axis=1) & (energy[:, 0] > 1e-8)
+        tau = self.tau_min + np.argmax(candidates, axis=1)
+
+        # Parabolische Interpolation um das Minimum
+        rows = np.arange(len(frames))
+        left = cmnd[rows, tau - 1]
+        center = cmnd[rows, tau]
+        right = cmnd[rows, np.minimum(tau + 1, self.tau_max)]
+        denominator = left - 2 * center + right
+        curved = np.abs(denominator) > 1e-12
+        shift = np.where(curved, 0.5 * (left - right) / np.where(curved, denominator, 1.0), 0.0)
+        refined = tau + np.clip(shift, -1, 1)
+
+        f0 = np.where(voiced, self.sample_rate / refined, 0.0)
+        return f0, voiced
+
+
+class PitchTrackStore:
+    """
+    Speichert Pitch-Verläufe als .pitch.npz neben der Sounddatei
+
+    Ein gespeicherter Verlauf wird wiederverwendet, solange sich Datei,
+    Abtastrate und Analyse-Parameter nicht ändern.
+    """
+
+    SUFFIX = '.pitch.npz'
+
+    def __init__(self):
+        self._memory = {}
+        self._lock = threading.Lock()
+
+    def track_path(self, sound_path):
+        sound_path = Path(sound_path)
+        return sound_path.with_name(sound_path.name + self.SUFFIX)
+
+    def get(self, sound_path, audio_data, tracker):
+        """
+        Liefert (f0, voiced) für eine Datei, analysiert nur bei Bedarf
+
+        :param audio_data: Die bereits dekodierten Daten der Datei
+        :param tracker: YinPitchTracker für die Analyse
+        """
+        sound_path = Path(sound_path)
+        stat = sound_path.stat()
+        signature = np.array([
+            stat.st_mtime_ns, stat.st_size, tracker.sample_rate,
+            tracker.frame_length, tracker.hop_length
+        ], dtype=np.int64)
+        key = str(sound_path)
+
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is not None and np.array_equal(entry[0], signature):
+            return entry[1], entry[2]
+
+        track_path = self.track_path(sound_path)
+        f0 = voiced = None
+        try:
+            if track_path.exists():
+                with np.load(track_path) as stored:
+                    if np.array_equal(stored['signature'], signature):
+                        f0, voiced = stored['f0'], stored['voiced']
+        except Exception as e:
+            logging.warning(f"Pitch-Verlauf {track_path} nicht lesbar: {e}")
+
+        if f0 is None:
+            f0, voiced = tracker.track(audio_data)
+            self._save(track_path, signature, f0, voiced)
+
+        with self._lock:
+            self._memory[key] = (signature, f0, voiced)
+        return f0, voiced
+
+    def _save(self, track_path, signature, f0, voiced):
+        """
+        Schreibt den Verlauf atomar (temporäre Datei und Umbenennen)
+
+        Der temporäre Name ist je Prozess und Thread eindeutig: Batch-Worker
+        und Warmup-Threads können dieselbe Datei gleichzeitig analysieren.
+        """
+        temp_path = track_path.with_name(
+            f"{track_path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+        try:
+            with open(temp_path, 'wb') as f:
+                np.savez(f, signature=signature, f0=f0, voiced=voiced)
+            os.replace(temp_path, track_path)
+        except Exception as e:
+            logging.warning(f"Pitch-Verlauf {track_path} nicht gespeichert: {e}")
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
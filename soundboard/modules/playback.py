@@ -0,0 +1,261 @@
+import logging
+import soundfile as sf
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from .mixer import Mixer, VoiceManager
+
+try:
+    import sounddevice as sd
+except (ImportError, OSError):
+    # sounddevice fehlt oder PortAudio ist nicht installiert
+    sd = None
+
+
+class SoundDeviceBackend:
+    """
+    Spielt NumPy-Puffer direkt über sounddevice ab - ohne Datei-I/O
+
+    Alle Sounds laufen durch einen Mixer auf einem einzigen Ausgabe-Stream.
+    """
+    name = 'sounddevice'
+    thread_safe = True
+
+    def __init__(self, device=None, volume=1.0, sample_rate=44100, channels=2,
+                 block_size=512, voice_manager=None):
+        if sd is None:
+            raise RuntimeError("sounddevice ist nicht verfügbar")
+
+        self.device = None if device in (None, 'default') else device
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.mixer = Mixer(sample_rate, channels, master_gain=volume,
+                           voice_manager=voice_manager)
+
+        self.stream = sd.OutputStream(
+            samplerate=sample_rate,
+            channels=channels,
+            dtype='float32',
+            device=self.device,
+            blocksize=block_size,
+            latency='low',
+            callback=self._callback
+        )
+        self.stream.start()
+        # Pufferlatenz bis zum DAC, für die Latenz-Messung
+        self.output_latency = self.stream.latency
+        logging.info(f"sounddevice-Ausgabe aktiv (Gerät: {device}, {sample_rate} Hz)")
+
+    def _callback(self, outdata, frames, time_info, status):
+        self.mixer.render(frames, out=outdata)
+
+    def play(self, audio_data, sample_rate, sound_file=None, bus=0, **voice_options):
+        """
+        Übergibt einen Puffer (siehe mixer.conform) an den Mixer
+
+        :param voice_options: key, choke_group, retrigger (siehe Mixer.add_voice)
+        """
+        return self.mixer.add_voice(audio_data, bus, sound_file, **voice_options)
+
+    def set_volume(self, volume):
+        self.mixer.set_master_gain(volume)
+
+    def set_bus_gain(self, bus, gain):
+        self.mixer.set_bus_gain(bus, gain)
+
+    def stop(self):
+        """Stoppt alle laufenden Sounds"""
+        self.mixer.stop_all()
+
+    def close(self):
+        self.stream.stop()
+        self.stream.close()
+
+
+class QtMediaBackend:
+    """
+    Fallback über QMediaPlayer
+
+    QMediaPlayer kann keine Puffer abspielen, daher wird jeder Sound als
+    temporäre WAV-Datei geschrieben. Die Player sind gleichmäßig auf die
+    Busse verteilt, die Bus-Lautstärke wird über deren Volume abgebildet.
+    """
+    name = 'qt'
+    thread_safe = False
+    sample_rate = None
+    channels = None
+    output_latency = None
+
+    def __init__(self, sounds_dir, volume=1.0, player_count=16, bus_count=4):
+        from PyQt5.QtMultimedia import QMediaPlayer
+
+        self.sounds_dir = Path(sounds_dir)
+        self.players = [QMediaPlayer() for _ in range(player_count)]
+        self.players_per_bus = player_count // bus_count
+        self.bus_gains = [1.0] * bus_count
+        self.next_player = [0] * bus_count
+        self.volume = volume
+        for bus in range(bus_count):
+            self._apply_bus_volume(bus)
+        logging.info("QMediaPlayer-Ausgabe aktiv")
+
+    def _bus_players(self, bus):
+        start = bus * self.players_per_bus
+        return self.players[start:start + self.players_per_bus]
+
+    def _apply_bus_volume(self, bus):
+        volume_int = max(0, min(100, int(self.bus_gains[bus] * self.volume * 100)))
+        for player in self._bus_players(bus):
+            player.setVolume(volume_int)
+
+    def play(self, audio_data, sample_rate, sound_file=None, bus=0, **voice_options):
+        # Voice-Management gibt es nur mit dem Mixer
+        from PyQt5.QtMultimedia import QMediaContent
+        from PyQt5.QtCore import QUrl
+
+        # Speichere verarbeitetes Audio temporär
+        temp_path = self.sounds_dir / f"temp_{Path(sound_file).name}"
+        sf.write(temp_path, audio_data, sample_rate)
+
+        # Wähle nächsten Player des Busses
+        bus = min(max(int(bus), 0), len(self.bus_gains) - 1)
+        players = self._bus_players(bus)
+        player = players[self.next_player[bus]]
+        self.next_player[bus] = (self.next_player[bus] + 1) % len(players)
+
+        player.setMedia(QMediaContent(QUrl.fromLocalFile(str(temp_path))))
+        player.play()
+
+    def set_volume(self, volume):
+        self.volume = volume
+        for bus in range(len(self.bus_gains)):
+            self._apply_bus_volume(bus)
+
+    def set_bus_gain(self, bus, gain):
+        if 0 <= bus < len(self.bus_gains):
+            self.bus_gains[bus] = gain
+            self._apply_bus_volume(bus)
+
+    def stop(self):
+        for player in self.players:
+            player.stop()
+
+    def close(self):
+        self.stop()
+
+
+class NullBackend:
+    """
+    Ausgabe ohne Soundhardware
+
+    Ein Taktgeber-Thread liest den Mixer in Echtzeit aus, wie es eine
+    Soundkarte tun würde. Die Mischung wird verworfen oder, wenn ein
+    Verzeichnis angegeben ist, als null_sink.wav geschrieben (File-Sink).
+    Gedacht für Tests und Benchmarks auf Rechnern ohne Audio-Ausgabe.
+    `played` hält nur die letzten PLAY_HISTORY Aufrufe, damit lange Läufe
+    nicht unbegrenzt Speicher belegen; play_count zählt alle.
+    """
+    name = 'null'
+    thread_safe = True
+    output_latency = 0.0
+    PLAY_HISTORY = 256
+
+    def __init__(self, sink_dir=None, volume=1.0, sample_rate=44100, channels=2,
+                 block_size=512, voice_manager=None):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.block_size = block_size
+        self.mixer = Mixer(sample_rate, channels, master_gain=volume,
+                           voice_manager=voice_manager)
+        self.played = deque(maxlen=self.PLAY_HISTORY)
+        self.play_count = 0
+        # Vom Taktgeber ausgelesene Samples (auch ohne File-Sink)
+        self.frames_rendered = 0
+
+        self.sink = None
+        if sink_dir:
+            sink_dir = Path(sink_dir)
+            sink_dir.mkdir(parents=True, exist_ok=True)
+            self.sink = sf.SoundFile(
+                sink_dir / 'null_sink.wav', 'w', samplerate=sample_rate,
+                channels=channels
+            )
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='NullSink', daemon=True)
+        self._thread.start()
+        logging.info(f"Null-Ausgabe aktiv (Sink: {sink_dir})")
+
+    def _run(self):
+        period = self.block_size / self.sample_rate
+        deadline = time.monotonic()
+        while self._running:
+            block = self.mixer.render(self.block_size)
+            self.frames_rendered += len(block)
+            if self.sink is not None:
+                self.sink.write(block)
+            deadline += period
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                deadline = time.monotonic()
+
+    def play(self, audio_data, sample_rate, sound_file=None, bus=0, **voice_options):
+        self.play_count += 1
+        self.played.append({
+            'sound_file': sound_file,
+            'bus': bus,
+            'time': time.monotonic()
+        })
+        return self.mixer.add_voice(audio_data, bus, sound_file, **voice_options)
+
+    def set_volume(self, volume):
+        self.mixer.set_master_gain(volume)
+
+    def set_bus_gain(self, bus, gain):
+        self.mixer.set_bus_gain(bus, gain)
+
+    def stop(self):
+        self.mixer.stop_all()
+
+    def close(self):
+        self._running = False
+        self._thread.join(timeout=1.0)
+        if self.sink is not None:
+            self.sink.close()
+            self.sink = None
+
+
+def create_backend(audio_settings, sounds_dir):
+    """
+    Erzeugt das Ausgabe-Backend laut audio_settings['backend']
+
+    'auto' (Standard) versucht sounddevice und fällt auf QMediaPlayer
+    zurück, 'null' verwendet die Null-Ausgabe.
+    """
+    backend = audio_settings.get('backend', 'auto')
+    volume = audio_settings.get('volume', 1.0)
+    stream_settings = {
+        'sample_rate': audio_settings.get('sample_rate', 44100),
+        'channels': audio_settings.get('channels', 2),
+        'block_size': audio_settings.get('block_size', 512),
+        'voice_manager': VoiceManager(
+            audio_settings.get('max_voices', 16),
+            audio_settings.get('voice_steal_policy', 'oldest')
+        )
+    }
+
+    if backend == 'null':
+        return NullBackend(audio_settings.get('null_sink_dir'), volume, **stream_settings)
+
+    if backend in ('auto', 'sounddevice'):
+        try:
+            return SoundDeviceBackend(
+                audio_settings.get('output_device'), volume, **stream_settings
+            )
+        except Exception as e:
+            logging.warning(f"sounddevice nicht nutzbar, verwende QMediaPlayer: {e}")
+
+    return QtMediaBackend(sounds_dir, volume)
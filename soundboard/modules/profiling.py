@@ -0,0 +1,186 @@
+import cProfile
+import functools
+import json
+import logging
+import sys
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+
+
+class SlowCallTracer:
+    """
+    Protokolliert einzelne Aufrufe, die länger als ein Schwellwert dauern
+
+    Die Methode wird nur auf der Instanz überdeckt, solange die Messung
+    läuft; remove() stellt die Klassenmethode wieder her. Ausgeschaltet
+    bleibt also kein Wrapper im Aufrufpfad.
+    """
+
+    def __init__(self, threshold_ms):
+        self.threshold = threshold_ms / 1000
+        self.calls = deque(maxlen=10000)
+        self._patched = []
+
+    def wrap(self, obj, method_name, describe=None):
+        """
+        :param describe: Funktion (args, kwargs) -> dict mit Details zum Aufruf
+        """
+        original = getattr(obj, method_name)
+        name = f"{type(obj).__name__}.{method_name}"
+        threshold = self.threshold
+        calls = self.calls
+
+        @functools.wraps(original)
+        def traced(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                if elapsed >= threshold:
+                    record = {
+                        'time': time.strftime('%H:%M:%S'),
+                        'call': name,
+                        'ms': round(elapsed * 1000, 3),
+                        'thread': threading.current_thread().name
+                    }
+                    if describe is not None:
+                        try:
+                            record.update(describe(args, kwargs))
+                        except Exception:
+                            pass
+                    calls.append(record)
+
+        setattr(obj, method_name, traced)
+        self._patched.append((obj, method_name))
+
+    def remove(self):
+        for obj, method_name in self._patched:
+            obj.__dict__.pop(method_name, None)
+        self._patched.clear()
+
+
+class StackSampler:
+    """
+    Sampling-Profiler über alle Threads
+
+    Ein Hintergrund-Thread liest in festen Abständen sys._current_frames()
+    und zählt die Aufrufstapel. Das Ergebnis ist im "collapsed"-Format
+    (eine Zeile je Stapel, Rahmen durch ';' getrennt) und kann z.B. mit
+    speedscope oder flamegraph.pl angesehen werden.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='StackSampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while self._running:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{Path(code.co_filename).stem}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+            time.sleep(self.interval)
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ProfilingSession:
+    """
+    Eine Profiling-Messung über ein festes Zeitfenster
+
+    mode 'sample' erfasst alle Threads (Render-Worker, Audio, GUI) per
+    StackSampler, mode 'cprofile' misst nur den Thread, der start()
+    aufruft (GUI), deterministisch mit cProfile. Dekodieren und Effekte
+    laufen auf den Scheduler- und Warmup-Workern und fehlen dort, dafür
+    ist 'sample' gedacht. Zusätzlich werden langsame Aufrufe der
+    übergebenen Methoden protokolliert. stop() schreibt alle Dateien mit
+    gemeinsamem Zeitstempel nach log_dir.
+    """
+
+    def __init__(self, log_dir='logs', mode='sample', sample_interval_ms=5, slow_call_ms=50):
+        if mode not in ('sample', 'cprofile'):
+            raise ValueError(f"Unbekannter Profiling-Modus: {mode}")
+        self.log_dir = Path(log_dir)
+        self.mode = mode
+        self.stamp = time.strftime('%Y%m%d-%H%M%S')
+        self.tracer = SlowCallTracer(slow_call_ms)
+        self._sampler = StackSampler(sample_interval_ms / 1000) if mode == 'sample' else None
+        self._profile = cProfile.Profile() if mode == 'cprofile' else None
+        self._started = None
+
+    def trace(self, obj, method_name, describe=None):
+        """Protokolliert langsame Aufrufe von obj.method_name während der Messung"""
+        self.tracer.wrap(obj, method_name, describe)
+
+    def start(self):
+        self._started = time.monotonic()
+        if self._sampler is not None:
+            self._sampler.start()
+        else:
+            self._profile.enable()
+        logging.info(f"Profiling gestartet (Modus {self.mode})")
+
+    def stop(self):
+        """
+        Beendet die Messung und schreibt die Ergebnisse
+
+        :return: Liste der geschriebenen Dateien
+        """
+        if self._sampler is not None:
+            self._sampler.stop()
+        else:
+            self._profile.disable()
+        self.tracer.remove()
+        duration = time.monotonic() - self._started
+
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        files = []
+        if self._sampler is not None:
+            path = self.log_dir / f"profile_{self.stamp}.folded"
+            self._sampler.write(path)
+            files.append(path)
+        else:
+            path = self.log_dir / f"profile_{self.stamp}.prof"
+            self._profile.dump_stats(str(path))
+            files.append(path)
+
+        path = self.log_dir / f"slow_calls_{self.stamp}.jsonl"
+        with open(path, 'w') as f:
+            for record in self.tracer.calls:
+                f.write(json.dumps(record) + '\n')
+        files.append(path)
+
+        logging.info(
+            f"Profiling beendet nach {duration:.1f} s, {len(self.tracer.calls)} langsame Aufrufe: "
+            f"{', '.join(str(path) for path in files)}"
+        )
+        return files
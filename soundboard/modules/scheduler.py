@@ -0,0 +1,173 @@
+import itertools
+import logging
+import threading
+from collections import OrderedDict
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class PlayJob:
+    """Ein Abspiel-Auftrag für einen Button"""
+
+    def __init__(self, key, sound_file, channel, generation, voice_options=None, trace=None):
+        self.key = key
+        self.sound_file = sound_file
+        self.channel = channel
+        self.generation = generation
+        self.voice_options = voice_options or {'key': key}
+        self.trace = trace
+        self.prepared = None
+
+    def started(self, voice):
+        """Schließt die Latenz-Messung ab, sobald die Stimme übergeben ist"""
+        if self.trace is not None:
+            self.trace.mark('handoff')
+            self.trace.finish(voice)
+
+    def abandon(self, outcome):
+        """Schließt die Latenz-Messung eines verworfenen Auftrags ab (siehe latency.OUTCOMES)"""
+        if self.trace is not None:
+            self.trace.finish(outcome=outcome)
+
+
+class RenderScheduler(QObject):
+    """
+    Bereitet Sounds in Worker-Threads vor, damit die GUI nie blockiert
+
+    Pro Schlüssel (Button) gilt nur der zuletzt eingereichte Auftrag: ein
+    erneuter Druck ersetzt einen noch wartenden Auftrag, ein bereits
+    laufender wird nach dem Rendern verworfen. Die Warteschlange ist
+    begrenzt, bei Überlauf fällt der älteste wartende Auftrag weg.
+
+    Ergebnisse werden über Qt-Signale an den GUI-Thread gemeldet. Backends,
+    die nicht threadsicher sind (QMediaPlayer), werden dort gestartet.
+    """
+    render_finished = pyqtSignal(object)
+    render_failed = pyqtSignal(object, str)
+    playback_started = pyqtSignal(object)
+
+    def __init__(self, audio_player, workers=2, max_pending=32):
+        super().__init__()
+        self.audio_player = audio_player
+        self.worker_count = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.dropped = 0
+
+        self._pending = OrderedDict()
+        self._latest = {}
+        self._generation = itertools.count(1)
+        self._condition = threading.Condition()
+        self._workers = []
+        self._running = False
+
+        # Queued Connection: der Slot läuft im Thread dieses Objekts (GUI)
+        self.render_finished.connect(self._start_on_gui_thread)
+
+    def start(self):
+        self._running = True
+        for index in range(self.worker_count):
+            worker = threading.Thread(target=self._run, name=f'Render-{index}', daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._pending.clear()
+            self._condition.notify_all()
+        for worker in self._workers:
+            worker.join(timeout=1.0)
+        self._workers.clear()
+
+    def submit(self, key, sound_file, channel=0, voice_options=None, trace=None):
+        """
+        Reicht einen Abspiel-Auftrag ein (threadsicher, blockiert nicht)
+
+        :param key: Schlüssel für "latest wins", z.B. die Button-ID
+        :param voice_options: Siehe AudioPlayer.voice_options()
+        :param trace: Optionaler latency.Trace des Auslösers
+        :return: Der PlayJob oder None, wenn der Druck ignoriert wird
+        """
+        # Retrigger 'ignore': gar nicht erst rendern, solange der Button spielt
+        if (voice_options and voice_options.get('retrigger') == 'ignore'
+                and self.audio_player.is_playing(voice_options.get('key', key))):
+            return None
+
+        with self._condition:
+            job = PlayJob(key, sound_file, channel, next(self._generation), voice_options, trace)
+            self._latest[key] = job.generation
+
+            # Wartenden Auftrag desselben Schlüssels ersetzen
+            replaced = self._pending.pop(key, None)
+            if replaced is not None:
+                replaced.abandon('superseded')
+            if len(self._pending) >= self.max_pending:
+                _, oldest = self._pending.popitem(last=False)
+                self.dropped += 1
+                oldest.abandon('overflow')
+                logging.warning(f"Render-Queue voll, verwerfe {oldest.sound_file}")
+            self._pending[key] = job
+            self._condition.notify()
+        return job
+
+    def cancel(self, key):
+        """Verwirft wartende und laufende Aufträge eines Schlüssels"""
+        with self._condition:
+            cancelled = self._pending.pop(key, None)
+            if cancelled is not None:
+                cancelled.abandon('superseded')
+            self._latest[key] = next(self._generation)
+
+    @property
+    def pending_count(self):
+        with self._condition:
+            return len(self._pending)
+
+    def _is_current(self, job):
+        with self._condition:
+            return self._latest.get(job.key) == job.generation
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._pending:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                _, job = self._pending.popitem(last=False)
+
+            if job.trace is not None:
+                job.trace.mark('dispatch')
+            try:
+                job.prepared = self.audio_player.load(job.sound_file, job.trace)
+            except Exception as e:
+                logging.error(f"Fehler beim Rendern von {job.sound_file}: {e}")
+                job.abandon('failed')
+                self.render_failed.emit(job, str(e))
+                continue
+
+            if job.prepared is None:
+                # z.B. Datei nicht gefunden (von load() geloggt)
+                job.abandon('failed')
+                continue
+            if not self._is_current(job):
+                self.audio_player.discard(job.prepared)
+                job.abandon('superseded')
+                continue
+
+            if self.audio_player.backend.thread_safe:
+                # Mixer-Backends nehmen Stimmen aus jedem Thread an
+                voice = self.audio_player.start(job.prepared, job.channel, **job.voice_options)
+                job.started(voice)
+                self.playback_started.emit(job)
+            self.render_finished.emit(job)
+
+    def _start_on_gui_thread(self, job):
+        if self.audio_player.backend.thread_safe:
+            return
+        if not self._is_current(job):
+            self.audio_player.discard(job.prepared)
+            job.abandon('superseded')
+            return
+        voice = self.audio_player.start(job.prepared, job.channel, **job.voice_options)
+        job.started(voice)
+        self.playback_started.emit(job)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Sound-Bank: vordekodierte Sounds in einer einzigen, memory-mappbaren Datei
+
+Aufbau der Datei:
+  - Kopf: Magic b'SBNK', Version und Länge des Index (struct '<4sII')
+  - Index: JSON mit Offset, Frames, Kanälen, Abtastrate, Datentyp sowie
+    mtime/Größe der Quelldatei je Sound
+  - PCM-Daten (float32 oder int16, interleaved), jeweils auf 64 Byte ausgerichtet
+
+Erstellen (im Verzeichnis soundboard):
+  python -m modules.sound_bank sounds sounds.bank --rate 44100 --channels 2
+"""
+import argparse
+import json
+import logging
+import mmap
+import os
+import struct
+from pathlib import Path
+import soundfile as sf
+import numpy as np
+from .mixer import conform
+
+MAGIC = b'SBNK'
+VERSION = 1
+HEADER = struct.Struct('<4sII')
+ALIGNMENT = 64
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.flac', '.ogg')
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def build_bank(sounds_dir, bank_path, dtype='float32', sample_rate=None, channels=None):
+    """
+    Dekodiert alle Sounds eines Verzeichnisses in eine Bank-Datei
+
+    Mit sample_rate und channels werden die Daten direkt im Format des
+    Mixers abgelegt und können ohne Umrechnung abgespielt werden.
+
+    :return: Anzahl der Sounds in der Bank
+    """
+    sounds_dir = Path(sounds_dir)
+    bank_path = Path(bank_path)
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.int16):
+        raise ValueError(f"Nicht unterstützter Datentyp: {dtype}")
+
+    segments = []
+    index = {}
+    for sound_path in sorted(sounds_dir.rglob('*')):
+        if sound_path.suffix.lower() not in AUDIO_EXTENSIONS or sound_path.name.startswith('temp_'):
+            continue
+        try:
+            audio_data, rate = sf.read(str(sound_path), dtype='float32', always_2d=True)
+        except Exception as e:
+            logging.warning(f"Überspringe {sound_path}: {e}")
+            continue
+
+        if channels:
+            audio_data = conform(audio_data, rate, sample_rate, channels)
+            rate = sample_rate or rate
+        if dtype == np.int16:
+            audio_data = np.round(np.clip(audio_data, -1.0, 1.0) * 32767).astype(np.int16)
+
+        stat = sound_path.stat()
+        name = sound_path.relative_to(sounds_dir).as_posix()
+        index[name] = {
+            'frames': len(audio_data),
+            'channels': audio_data.shape[1],
+            'sample_rate': rate,
+            'dtype': dtype.name,
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size
+        }
+        segments.append((name, np.ascontiguousarray(audio_data)))
+
+    # Offsets hängen von der Indexlänge ab - Platzhalter fester Breite
+    for name, _ in segments:
+        index[name]['offset'] = 0
+    placeholder = json.dumps(index).encode('utf-8')
+    index_length = len(placeholder) + 16 * len(segments)
+
+    offset = _align(HEADER.size + index_length)
+    for name, data in segments:
+        index[name]['offset'] = offset
+        offset = _align(offset + data.nbytes)
+
+    index_bytes = json.dumps(index).encode('utf-8').ljust(index_length)
+
+    temp_path = bank_path.with_name(bank_path.name + '.tmp')
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, index_length))
+        f.write(index_bytes)
+        for name, data in segments:
+            f.seek(index[name]['offset'])
+            f.write(data.tobytes())
+    os.replace(temp_path, bank_path)
+
+    logging.info(f"Sound-Bank {bank_path} mit {len(segments)} Sounds erstellt")
+    return len(segments)
+
+
+class SoundBank:
+    """
+    Liest eine Bank-Datei per Memory-Mapping
+
+    Die gelieferten Arrays sind schreibgeschützte NumPy-Views auf das
+    Mapping - es wird weder kopiert noch dekodiert. Mehrere Prozesse, die
+    dieselbe Bank öffnen, teilen sich die Speicherseiten.
+    """
+
+    def __init__(self, bank_path):
+        self.bank_path = Path(bank_path)
+        with open(self.bank_path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, index_length = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{self.bank_path} ist keine gültige Sound-Bank")
+
+        raw_index = self._map[HEADER.size:HEADER.size + index_length]
+        self.index = json.loads(raw_index.decode('utf-8').rstrip())
+        logging.info(f"Sound-Bank {self.bank_path} geladen ({len(self.index)} Sounds)")
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def get(self, name, sound_path=None):
+        """
+        Liefert (view, sample_rate) für einen Sound oder None
+
+        :param sound_path: Quelldatei; ist sie neuer als der Bank-Eintrag,
+                           wird None geliefert
+        """
+        entry = self.index.get(name)
+        if entry is None:
+            return None
+
+        if sound_path is not None:
+            stat = Path(sound_path).stat()
+            if stat.st_mtime_ns != entry['mtime_ns'] or stat.st_size != entry['size']:
+                return None
+
+        view = np.frombuffer(
+            self._map,
+            dtype=entry['dtype'],
+            count=entry['frames'] * entry['channels'],
+            offset=entry['offset']
+        ).reshape(entry['frames'], entry['channels'])
+        return view, entry['sample_rate']
+
+    def close(self):
+        self._map.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Erstellt eine Sound-Bank")
+    parser.add_argument('sounds_dir', help="Verzeichnis mit den Sounddateien")
+    parser.add_argument('bank_path', help="Ziel-Datei, z.B. sounds.bank")
+    parser.add_argument('--dtype', choices=['float32', 'int16'], default='float32')
+    parser.add_argument('--rate', type=int, default=None,
+                        help="Abtastrate des Mixers (audio_settings.sample_rate)")
+    parser.add_argument('--channels', type=int, default=None,
+                        help="Kanäle des Mixers (audio_settings.channels)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+    build_bank(args.sounds_dir, args.bank_path, args.dtype, args.rate, args.channels)
+
+
+if __name__ == "__main__":
+    main()
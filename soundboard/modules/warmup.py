@@ -0,0 +1,143 @@
+import itertools
+import logging
+import queue
+import threading
+from PyQt5.QtCore import QObject, pyqtSignal
+
+SOUND_EXTENSIONS = ('.wav', '.mp3')
+
+
+def collect_sound_files(config):
+    """
+    Sammelt alle Sounddateien aus Buttons, GPIO- und Matrix-Aktionen der Konfiguration
+
+    Die Reihenfolge bleibt erhalten, doppelte Einträge werden entfernt.
+    """
+    actions = [
+        button.get('action') for button in config.get('buttons', {}).values()
+    ]
+    actions += list(config.get('gpio_actions', {}).values())
+    actions += list(config.get('keypad_actions', {}).values())
+    sound_files = [
+        action for action in actions
+        if isinstance(action, str) and action.endswith(SOUND_EXTENSIONS)
+    ]
+    return list(dict.fromkeys(sound_files))
+
+
+class SoundWarmup(QObject):
+    """
+    Dekodiert und rendert die konfigurierten Sounds im Hintergrund vor
+
+    Die Arbeit verteilt sich auf mehrere Worker-Threads, die eine
+    Prioritäts-Queue abarbeiten. Wird ein noch nicht vorbereiteter Sound
+    gedrückt, rückt er mit prioritize() an den Anfang der Queue. Ein
+    fehlgeschlagener Sound wird einmal erneut eingereiht und gilt danach als
+    erledigt, aber nicht als warm. Der Fortschritt wird über das Signal
+    progress(erledigt, gesamt) gemeldet.
+    """
+    progress = pyqtSignal(int, int)
+
+    PRIORITY_PRESSED = 0
+    PRIORITY_NORMAL = 1
+    RETRIES = 1
+
+    def __init__(self, audio_player, sound_files, workers=2):
+        super().__init__()
+        self.audio_player = audio_player
+        self.sound_files = list(sound_files)
+        self.worker_count = max(1, workers)
+
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._done = set()
+        self._active = set()
+        self._attempts = {}
+        self._failed = set()
+        self._lock = threading.Lock()
+        self._workers = []
+        self._running = False
+
+    @property
+    def total(self):
+        return len(self.sound_files)
+
+    def start(self):
+        """Startet die Worker und stellt alle Sounds in die Queue"""
+        if not self.sound_files:
+            self.progress.emit(0, 0)
+            return
+
+        self._running = True
+        for sound_file in self.sound_files:
+            self._queue.put((self.PRIORITY_NORMAL, next(self._order), sound_file))
+
+        for index in range(self.worker_count):
+            worker = threading.Thread(
+                target=self._run, name=f'Warmup-{index}', daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+        logging.info(f"Vorladen von {self.total} Sounds gestartet")
+
+    def prioritize(self, sound_file):
+        """Zieht einen noch nicht vorbereiteten Sound nach vorne"""
+        if not self._running:
+            return
+        with self._lock:
+            if self._is_settled(sound_file) or sound_file in self._active:
+                return
+        self._queue.put((self.PRIORITY_PRESSED, next(self._order), sound_file))
+
+    def is_warm(self, sound_file):
+        with self._lock:
+            return sound_file in self._done
+
+    def _is_settled(self, sound_file):
+        return sound_file in self._done or sound_file in self._failed
+
+    def stop(self):
+        """Beendet die Worker nach dem aktuellen Sound"""
+        self._running = False
+        for _ in self._workers:
+            self._queue.put((-1, next(self._order), None))
+        for worker in self._workers:
+            worker.join(timeout=1.0)
+        self._workers.clear()
+
+    def _run(self):
+        while self._running:
+            _, _, sound_file = self._queue.get()
+            if sound_file is None:
+                continue
+            with self._lock:
+                # Doppelte Einträge (prioritize) nur einmal bearbeiten
+                if self._is_settled(sound_file) or sound_file in self._active:
+                    continue
+                self._active.add(sound_file)
+
+            try:
+                # False z.B. bei fehlender Datei (wird von prepare() geloggt)
+                succeeded = bool(self.audio_player.prepare(sound_file))
+            except Exception as e:
+                logging.error(f"Fehler beim Vorladen von {sound_file}: {e}")
+                succeeded = False
+
+            with self._lock:
+                self._active.discard(sound_file)
+                if succeeded:
+                    self._done.add(sound_file)
+                else:
+                    attempts = self._attempts.get(sound_file, 0) + 1
+                    self._attempts[sound_file] = attempts
+                    if attempts <= self.RETRIES:
+                        self._queue.put((self.PRIORITY_NORMAL, next(self._order), sound_file))
+                        continue
+                    self._failed.add(sound_file)
+                settled = len(self._done) + len(self._failed)
+                failed = len(self._failed)
+            self.progress.emit(settled, self.total)
+
+            if settled == self.total:
+                logging.info(
+                    f"Vorladen abgeschlossen ({settled - failed} Sounds, {failed} fehlgeschlagen)")
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Die Module werden wie in main.py als `modules.<name>` importiert
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'soundboard'))
@@ -0,0 +1,116 @@
+import threading
+import time
+import pytest
+
+pytest.importorskip('usb')
+from modules.hid_communication import HIDCommunication
+
+RELEASE = bytes(8)
+
+
+class FakeDevice:
+    """Nimmt Reports wie pyusb ctrl_transfer() entgegen; optional bis zur Freigabe blockierend"""
+
+    def __init__(self, blocked=False):
+        self.reports = []
+        self.gate = threading.Event()
+        if not blocked:
+            self.gate.set()
+
+    def ctrl_transfer(self, request_type, request, value, index, data):
+        self.gate.wait(5.0)
+        self.reports.append(bytes(data))
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def test_press_release_order_and_stats():
+    device = FakeDevice()
+    hid = HIDCommunication(device=device, hold_time=0.001)
+    try:
+        assert hid.send_command('play_pause')
+        assert hid.send_command('volume_down')
+        assert wait_for(lambda: hid.sent == 2)
+    finally:
+        hid.close()
+
+    play = HIDCommunication._build_report(HIDCommunication.MODIFIER_NONE, [0x2C])
+    volume_down = HIDCommunication._build_report(HIDCommunication.MODIFIER_NONE, [0x81])
+    assert device.reports == [play, RELEASE, volume_down, RELEASE]
+
+    stats = hid.get_stats()
+    assert stats['sent'] == 2
+    assert stats['coalesced'] == 0
+    assert stats['dropped'] == 0
+    assert stats['queue_depth'] == 0
+    assert stats['send_latency']['count'] == 2
+
+
+def test_repeated_volume_up_is_coalesced():
+    device = FakeDevice(blocked=True)
+    hid = HIDCommunication(device=device, hold_time=0.001, max_repeat=10)
+    try:
+        # Der erste Befehl hängt im Schreib-Thread, die weiteren warten
+        assert hid.send_command('play_pause')
+        assert wait_for(lambda: hid.queue_depth == 0)
+        for _ in range(12):
+            assert hid.send_command('volume_up')
+        # 10 im ersten Eintrag, 2 im zweiten
+        assert hid.queue_depth == 2
+        assert hid.coalesced == 10
+
+        device.gate.set()
+        assert wait_for(lambda: hid.sent == 13)
+    finally:
+        hid.close()
+
+    volume_up = HIDCommunication._build_report(HIDCommunication.MODIFIER_NONE, [0x80])
+    # Jeder zusammengefasste Befehl wird trotzdem einzeln gedrückt und losgelassen
+    assert device.reports[2:] == [volume_up, RELEASE] * 12
+    assert hid.get_stats()['dropped'] == 0
+
+
+def test_queue_is_bounded():
+    device = FakeDevice(blocked=True)
+    hid = HIDCommunication(device=device, queue_size=2, hold_time=0.001)
+    try:
+        assert hid.send_command('play_pause')
+        assert wait_for(lambda: hid.queue_depth == 0)
+        # Abwechselnde Befehle lassen sich nicht zusammenfassen
+        assert hid.send_command('volume_up')
+        assert hid.send_command('volume_down')
+        assert not hid.send_command('volume_up')
+        assert hid.get_stats()['dropped'] == 1
+        assert hid.queue_depth == 2
+    finally:
+        device.gate.set()
+        hid.close()
+
+
+def test_unknown_command_is_rejected():
+    hid = HIDCommunication(device=FakeDevice(), hold_time=0.001)
+    try:
+        assert not hid.send_command('does_not_exist')
+        assert hid.queue_depth == 0
+    finally:
+        hid.close()
+
+
+def test_write_error_switches_to_offline_mode():
+    class BrokenDevice:
+        def ctrl_transfer(self, *args):
+            raise OSError("USB getrennt")
+
+    hid = HIDCommunication(device=BrokenDevice(), hold_time=0.001)
+    try:
+        assert hid.send_command('play_pause')
+        assert wait_for(lambda: hid.emulation_mode)
+        assert not hid.send_command('play_pause')
+        assert hid.get_stats()['offline']
+    finally:
+        hid.close()
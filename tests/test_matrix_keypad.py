@@ -0,0 +1,108 @@
+import time
+import pytest
+
+pytest.importorskip('gpiozero')
+from gpiozero.pins.mock import MockConnectedPin, MockFactory
+from modules.gpio_handler import MatrixKeypad
+
+ROWS = [5, 6]
+COLUMNS = [2, 3]
+
+
+@pytest.fixture
+def factory():
+    factory = MockFactory()
+    yield factory
+    factory.reset()
+
+
+def press(factory, row, column):
+    """Verbindet Zeile und Spalte: die aktive (low) Zeile zieht die Spalte auf low"""
+    column_pin = factory.pin(COLUMNS[column])
+    factory.pin(ROWS[row], pin_class=MockConnectedPin, input_pin=column_pin)
+    return column_pin
+
+
+def release(factory, row, column):
+    factory.pin(ROWS[row]).input_pin = None
+    factory.pin(COLUMNS[column]).drive_high()
+
+
+def create_keypad(factory, debounce_scans=3):
+    # 1000 Hz: debounce_ms entspricht der Zahl der Abtastungen
+    return MatrixKeypad(ROWS, COLUMNS, on_press=None, scan_hz=1000,
+                        debounce_ms=debounce_scans, settle_us=0, pin_factory=factory)
+
+
+def test_press_and_release_are_debounced(factory):
+    press(factory, 1, 1)
+    keypad = create_keypad(factory)
+    try:
+        before = time.monotonic()
+        assert keypad.scan_once() == []
+        assert keypad.scan_once() == []
+        events = keypad.scan_once()
+        assert [(key, pressed) for key, pressed, _ in events] == [(3, True)]
+        # Zeitstempel der ersten Abtastung im neuen Zustand, nicht der Meldung
+        assert before <= events[0][2] <= time.monotonic()
+        assert keypad.pressed == [3]
+
+        release(factory, 1, 1)
+        released_at = time.monotonic()
+        assert keypad.scan_once() == []
+        assert keypad.scan_once() == []
+        events = keypad.scan_once()
+        assert [(key, pressed) for key, pressed, _ in events] == [(3, False)]
+        assert events[0][2] >= released_at
+        assert keypad.pressed == []
+    finally:
+        keypad.close()
+
+
+def test_bounce_shorter_than_debounce_is_ignored(factory):
+    keypad = create_keypad(factory)
+    try:
+        assert keypad.scan_once() == []
+        press(factory, 0, 1)
+        assert keypad.scan_once() == []
+        release(factory, 0, 1)
+        for _ in range(5):
+            assert keypad.scan_once() == []
+        assert keypad.pressed == []
+    finally:
+        keypad.close()
+
+
+def test_only_pressed_key_is_reported(factory):
+    press(factory, 0, 0)
+    keypad = create_keypad(factory, debounce_scans=1)
+    try:
+        events = keypad.scan_once()
+        assert [(key, pressed) for key, pressed, _ in events] == [(0, True)]
+        assert keypad.key_count == 4
+    finally:
+        keypad.close()
+
+
+def test_scan_thread_calls_callbacks(factory):
+    events = []
+    press(factory, 1, 0)
+    keypad = MatrixKeypad(
+        ROWS, COLUMNS,
+        on_press=lambda key, ts: events.append(('press', key, ts)),
+        on_release=lambda key, ts: events.append(('release', key, ts)),
+        scan_hz=1000, debounce_ms=2, pin_factory=factory
+    )
+    keypad.start()
+    try:
+        deadline = time.monotonic() + 2.0
+        while not events and time.monotonic() < deadline:
+            time.sleep(0.005)
+        release(factory, 1, 0)
+        while len(events) < 2 and time.monotonic() < deadline:
+            time.sleep(0.005)
+    finally:
+        keypad.close()
+
+    assert [(kind, key) for kind, key, _ in events] == [('press', 2), ('release', 2)]
+    assert events[0][2] <= events[1][2]
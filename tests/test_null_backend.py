@@ -0,0 +1,82 @@
+import time
+import numpy as np
+import pytest
+
+sf = pytest.importorskip('soundfile')
+from modules.audio import AudioPlayer
+from modules.playback import NullBackend
+
+SAMPLE_RATE = 44100
+
+
+def tone(frames, channels=2):
+    # Cosinus: schon das erste Sample ist ungleich 0, der Anfang ist also eindeutig
+    t = np.arange(frames) / SAMPLE_RATE
+    data = (0.25 * np.cos(2 * np.pi * 440 * t)).astype(np.float32)
+    return np.repeat(data[:, np.newaxis], channels, axis=1)
+
+
+def wait_until_finished(voice, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not voice.finished and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert voice.finished
+
+
+def read_sink(sink_dir):
+    data, sample_rate = sf.read(str(sink_dir / 'null_sink.wav'), dtype='float32', always_2d=True)
+    assert sample_rate == SAMPLE_RATE
+    start = int(np.flatnonzero(np.abs(data).max(axis=1) > 0)[0])
+    return data, start
+
+
+def test_samples_reach_the_sink(tmp_path):
+    backend = NullBackend(tmp_path, sample_rate=SAMPLE_RATE, block_size=256)
+    data = tone(4410)
+    try:
+        voice = backend.play(data, SAMPLE_RATE, 'tone')
+        wait_until_finished(voice)
+    finally:
+        backend.close()
+
+    sink, start = read_sink(tmp_path)
+    # Die Stimme beginnt an einer Blockgrenze; der Sink speichert 16 Bit
+    assert start % 256 == 0
+    np.testing.assert_allclose(sink[start:start + len(data)], data, atol=1e-4)
+    assert not np.any(sink[start + len(data):])
+    assert backend.frames_rendered == len(sink)
+
+
+def test_play_history_is_bounded():
+    backend = NullBackend(sample_rate=SAMPLE_RATE)
+    try:
+        for index in range(NullBackend.PLAY_HISTORY + 10):
+            backend.play(tone(16), SAMPLE_RATE, f"tone{index}")
+    finally:
+        backend.close()
+
+    assert backend.play_count == NullBackend.PLAY_HISTORY + 10
+    assert len(backend.played) == NullBackend.PLAY_HISTORY
+    assert backend.played[-1]['sound_file'] == f"tone{NullBackend.PLAY_HISTORY + 9}"
+
+
+def test_audio_player_plays_through_null_sink(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'sounds').mkdir()
+    data = tone(SAMPLE_RATE // 10)
+    sf.write(str(tmp_path / 'sounds' / 'tone.wav'), data, SAMPLE_RATE, subtype='FLOAT')
+
+    player = AudioPlayer({
+        'backend': 'null', 'null_sink_dir': str(tmp_path / 'sink'),
+        'sample_rate': SAMPLE_RATE, 'channels': 2
+    })
+    player.set_effect_params({'autotune': 0, 'echo': 0, 'reverb': 0, 'distortion': 0})
+    try:
+        voice = player.play('tone.wav')
+        assert voice is not None
+        wait_until_finished(voice)
+    finally:
+        player.close()
+
+    sink, start = read_sink(tmp_path / 'sink')
+    np.testing.assert_allclose(sink[start:start + len(data)], data, atol=1e-4)
@@ -2,6 +2,10 @@ import hid
 import sys
 import keyboard
 import logging
+import queue
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 import json
 import time
@@ -16,6 +20,59 @@ ICON_BASE64 = """
 iVBORw0KGgoAAAANSUhEUgAAACAAAAAgCAYAAABzenr0AAAABHNCSVQICAgIfAhkiAAAAAlwSFlzAAAOxAAADsQBlSsOGwAAABl0RVh0U29mdHdhcmUAd3d3Lmlua3NjYXBlLm9yZ5vuPBoAAAJhSURBVFiF7ZdNaBNBFMd/s9uktqixSG0CUqwgFT+gBw8q6EXwJB4EQcSDINqLX3gQBC2CJ8GT9KB48CKIiCAIgop48CsVRKUgiBUpiFW0tcakJN3ZedhNdrJJNtlNc+nA/GBg583M+8/8Z96bXaWUYjOhN1McqDtYoYBG0TvQKHoHGkVPowKUUhv+6QC2bbewLMuybQchJFJKpJQoJRFCALDaMYQQKKUQQiCEwPO8TGzbxnEcXNfF8zzyPI98Po/neQghSgKEEAghEEIQRREARVFEFEWEYUgYhoRhSBAEBEFAv99n0O8TxzFxHJMkCUmSkCQJruvi+z6DwYB8Pk+hUKBQKGBZVkuSJFiWhed5eJ6H67q4rovv+/i+TxAEhGFIFEXEcUwcxyRJQpqmpGlKmqYopYjjmDiOGQwGDAYDkiQhSRKSJEEpRZqmKKVQSqGUIo5jlFKlWCmFUoooilBKEUURURSVYsMwsCwL0zQxTRPDMLAsC9M0MQwDXdfRNA1d19E0DU3T0DQNXdfRdR1N09A0DV3XMQwDwzAwDANd10t9TdMwDAPTNLEsC8uycBwHx3FwXRfXdXEcB9u2sW0bx3GwbRvLsrAsC8dxcF0Xx3FwHAfP8/A8D9/38X2fIAgIw5AoioiiiDiOieOYJElIkoQkSUiShDRNSdOUNE2J45g4jkmShCRJSJKENE1RSpGmKUopkiQhSRKSJCFJEtI0RSmFUoo0TUnTlCiKiKKIMAwJw5AwDAmCgCAICAKv9CYMgoBCoUChUCCfz5PP5/E8D9d1cRwHx3GwLAvLsnAcB8dxsG0b27axLAvLsv4BQhHjN3hzJHMAAAAASUVORK5CYII=
 """
 
+# RateLimitFilter und JsonFormatter entsprechen soundboard/modules/log_pipeline.py;
+# der Client wird einzeln auf dem Windows-PC installiert und kann das
+# Soundboard-Paket nicht importieren
+class RateLimitFilter(logging.Filter):
+    """Höchstens `burst` Meldungen je Code-Stelle (ab WARNING: je Text) und `interval` Sekunden"""
+    MAX_WINDOWS = 1000
+
+    def __init__(self, burst=20, interval=10.0):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if not self.burst:
+            return True
+        key = (record.pathname, record.lineno)
+        if record.levelno >= logging.WARNING:
+            key += (record.getMessage(),)
+        with self._lock:
+            if len(self._windows) > self.MAX_WINDOWS:
+                self._windows = {
+                    k: w for k, w in self._windows.items()
+                    if record.created - w[0] < self.interval
+                }
+            window = self._windows.get(key)
+            if window is None or record.created - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [record.created, 1, 0]
+                if suppressed:
+                    record.msg = f"{record.msg} ({suppressed} gleiche Meldungen unterdrückt)"
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+class JsonFormatter(logging.Formatter):
+    """Eine JSON-Zeile je Meldung"""
+
+    def format(self, record):
+        return json.dumps({
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'thread': record.threadName,
+            'line': record.lineno,
+            'message': record.getMessage()
+        }, ensure_ascii=False)
+
+
 class HIDThread(QThread):
     command_received = pyqtSignal(list)
     
@@ -51,8 +108,12 @@ class SoundboardReceiver(QWidget):
         self.VENDOR_ID = 0x0483
         self.PRODUCT_ID = 0x5750
         
+        config_error = self.load_config()
         self.setup_logging()
-        self.load_config()
+        if config_error:
+            logging.error(f"Fehler beim Laden der Konfiguration: {config_error}")
+        else:
+            logging.info("Konfiguration geladen")
         self.init_ui()
         self.create_tray_icon()
         self.start_hid_thread()
@@ -66,23 +127,45 @@ class SoundboardReceiver(QWidget):
         )
 
     def setup_logging(self):
+        """
+        Logging über eine Queue - der HID-Thread schreibt nie selbst in die Datei
+
+        Einstellungen im Abschnitt `logging` der config.json (siehe README).
+        """
+        settings = self.config.get('logging', {})
         log_dir = Path('logs')
         log_dir.mkdir(exist_ok=True)
         
-        logging.basicConfig(
-            filename=log_dir / 'receiver.log',
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
+        json_lines = settings.get('json', False)
+        file_handler = RotatingFileHandler(
+            log_dir / ('receiver.jsonl' if json_lines else 'receiver.log'),
+            maxBytes=int(settings.get('max_mb', 5) * 1024 * 1024),
+            backupCount=settings.get('backup_count', 3),
+            encoding='utf-8'
         )
+        file_handler.setFormatter(
+            JsonFormatter() if json_lines
+            else logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        
+        queue_handler = QueueHandler(queue.SimpleQueue())
+        queue_handler.addFilter(RateLimitFilter(
+            settings.get('rate_limit_burst', 20), settings.get('rate_limit_interval_s', 10.0)))
+        root = logging.getLogger()
+        root.setLevel(settings.get('level', 'INFO'))
+        root.addHandler(queue_handler)
+        
+        self.log_listener = QueueListener(queue_handler.queue, file_handler)
+        self.log_listener.start()
 
     def load_config(self):
+        """Lädt die config.json, liefert den Fehler oder None"""
         try:
             with open('config.json', 'r') as f:
                 self.config = json.load(f)
-            logging.info("Konfiguration geladen")
         except Exception as e:
-            logging.error(f"Fehler beim Laden der Konfiguration: {e}")
             self.config = {}
+            return e
+        return None
 
     def init_ui(self):
         self.setWindowTitle('Soundboard Receiver')
@@ -206,6 +289,7 @@ class SoundboardReceiver(QWidget):
     def quit_app(self):
         self.hid_thread.running = False
         self.hid_thread.wait()
+        self.log_listener.stop()
         QApplication.quit()
 
     def closeEvent(self, event):